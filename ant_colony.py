@@ -0,0 +1,91 @@
+import numpy as np
+
+from tsp_core import SolutionStats, Timer
+from tsp_cuttree import CutTree
+from genetic import tour_costs
+from tsp_local_search import is_symmetric
+from tsp_solve import greedy_tour, dfs
+from tsp_stats import add_stats, empty_stats
+
+
+def construct_tours(choice: np.ndarray, ants: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Build one tour per ant, all ants moving together.
+
+    choice[i, j] is the attractiveness of going from i to j (pheromone^alpha * heuristic^beta).
+    At each step every ant samples its next city in proportion to the choice row of its current city,
+    with visited cities masked out. An ant with no reachable city left takes any unvisited one.
+    """
+    n = len(choice)
+    ant_rows = np.arange(ants)
+    tours = np.empty((ants, n), dtype=int)
+    tours[:, 0] = rng.integers(0, n, size=ants)
+    unvisited = np.ones((ants, n), dtype=bool)
+    unvisited[ant_rows, tours[:, 0]] = False
+
+    for step in range(1, n):
+        weights = choice[tours[:, step - 1]] * unvisited
+        cumulative = np.cumsum(weights, axis=1)
+        total = cumulative[:, -1]
+        # The first city whose cumulative weight passes the sample (it has a non-zero weight)
+        sample = rng.random(ants) * total
+        nxt = (cumulative <= sample[:, None]).sum(axis=1)
+        stuck = total <= 0
+        if stuck.any():
+            nxt[stuck] = unvisited[stuck].argmax(axis=1)
+        tours[:, step] = nxt
+        unvisited[ant_rows, nxt] = False
+    return tours
+
+
+def ant_colony(edges: list[list[float]], timer: Timer, ants: int = 20, alpha: float = 1.0, beta: float = 3.0,
+               evaporation: float = 0.5, seed: int = None) -> list[SolutionStats]:
+    """
+    Ant System with an elitist ant.
+
+    Each iteration, the colony builds its tours (construct_tours), pheromone evaporates by
+    the evaporation rate, and every ant deposits 1 / length on the edges of its tour,
+    as does the best tour so far (in both directions on symmetric matrices).
+    The heuristic is 1 / edge weight, and 0 for missing edges,
+    so ants never choose an inf edge unless they are stuck.
+    """
+
+    n = len(edges)
+    if n < 3:
+        return dfs(edges, timer)
+
+    graph = np.asarray(edges, dtype=float)
+    symmetric = is_symmetric(graph)
+    heuristic = np.where(np.isfinite(graph), 1 / np.maximum(graph, 1e-12), 0) ** beta
+    np.fill_diagonal(heuristic, 0)
+
+    stats = [st for st in greedy_tour(edges, timer.child(timer.time_limit * 0.1)) if st.tour]
+    bssf_cost = stats[-1].score if stats else np.inf
+    best_tour = np.array(stats[-1].tour) if stats else None
+    pheromone = np.full((n, n), ants / bssf_cost if np.isfinite(bssf_cost) else 1.0)
+
+    rng = np.random.default_rng(seed)
+    cut_tree = CutTree(n)
+    n_tours = 0
+    while not timer.time_out():
+        tours = construct_tours(pheromone ** alpha * heuristic, ants, rng)
+        costs = tour_costs(graph, tours)
+        n_tours += ants
+
+        best = int(costs.argmin())
+        if costs[best] < bssf_cost:
+            best_tour = tours[best]
+            stats, bssf_cost = add_stats(stats, timer, n_tours, 0, cut_tree,
+                                         "local search", best_tour.tolist(), edges, bssf_cost)
+
+        if best_tour is not None:
+            tours = np.concatenate((tours, best_tour[None]))
+            costs = np.append(costs, bssf_cost)
+        pheromone *= 1 - evaporation
+        following = np.roll(tours, -1, axis=1)
+        amounts = np.broadcast_to((1 / costs)[:, None], tours.shape)
+        np.add.at(pheromone, (tours, following), amounts)
+        if symmetric:
+            np.add.at(pheromone, (following, tours), amounts)
+
+    return stats or empty_stats(timer, edges)
@@ -2,6 +2,8 @@ import copy
 from math import inf
 from collections import deque
 
+import numpy as np
+
 from tsp_core import Tour, SolutionStats, Timer, score_tour, Solver
 
 
@@ -70,59 +72,275 @@ def reduction(edges):
     return graph, lower_bound
 
 
-# def infinity_row(outgoing_edges):
-#     for i in range(len(outgoing_edges)):
-#         outgoing_edges[i] = inf
-#     return outgoing_edges
-#
-# def infinity_col(edges, col_index):
-#     for i in range(len(edges)):
-#         edges[i][col_index] = inf
-#     return edges
-
-
-
-# def choosing_edge(edges, initial_lb, chosen_branch, ignored_branches):
-#
-#     options = []
-#     graphs = []
-#     outgoing_edges = edges[chosen_branch]
-#
-#
-#
-#     for i in range(len(outgoing_edges)):
-#
-#         if chosen_branch in ignored_branches:
-#             if i in ignored_branches[chosen_branch]:
-#                 continue
-#
-#         copy_g = copy.deepcopy(edges)
-#         cost = outgoing_edges[i]
-#
-#
-#         copy_g[chosen_branch] = infinity_row(copy_g[chosen_branch])
-#         copy_g = infinity_col(copy_g, i)
-#
-#         copy_g, lower_bound = reduction(copy_g)
-#         lower_bound = cost + lower_bound + initial_lb
-#
-#         options.append(lower_bound)
-#         graphs.append(copy_g)
-#
-#     smallest, smallest_index = smallest_from_row(options)
-#     graph = graphs[smallest_index]
-#     graph[smallest_index][chosen_branch] = inf
-#
-#     return smallest, smallest_index, graph
-
-
-
-
-
-
-
-
-
+def reduction_array(edges: np.ndarray, inplace: bool = False) -> tuple[np.ndarray, float]:
+    """
+    Same reduction as `reduction`, but on an n x n ndarray.
+    Rows and columns that are entirely inf are left alone and add nothing to the bound.
+    Unless inplace=True (and edges is already a float array), the input is not modified.
+    """
+    graph = edges if inplace and isinstance(edges, np.ndarray) else np.array(edges, dtype=float)
+    if graph.size == 0:
+        return graph, 0
+
+    row_min = graph.min(axis=1)
+    row_min[np.isinf(row_min)] = 0
+    graph -= row_min[:, None]
+
+    col_min = graph.min(axis=0)
+    col_min[np.isinf(col_min)] = 0
+    graph -= col_min[None, :]
+
+    return graph, float(row_min.sum() + col_min.sum())
+
+
+def reduction_batch(graphs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    `reduction_array` over a (k, n, n) stack of matrices at once, in place.
+    Returns the reduced stack and the k lower bounds.
+    """
+    row_min = graphs.min(axis=2)
+    row_min[np.isinf(row_min)] = 0
+    graphs -= row_min[:, :, None]
+
+    col_min = graphs.min(axis=1)
+    col_min[np.isinf(col_min)] = 0
+    graphs -= col_min[:, None, :]
+
+    return graphs, row_min.sum(axis=1) + col_min.sum(axis=1)
+
+
+def child_matrices(graph: np.ndarray, last: int, cities: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build the (unreduced) children last -> city for every city in cities as one (k, n, n) array.
+    Returns the children and the reduced cost of each move.
+    """
+    k = len(cities)
+    children = np.repeat(graph[None], k, axis=0)
+    index = np.arange(k)
+
+    move_costs = graph[last, cities]
+    children[:, last, :] = inf
+    children[index, :, cities] = inf
+    children[index, cities, last] = inf
+    return children, move_costs
+
+
+def expand_children(graph: np.ndarray, last: int, cities: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build and reduce the children last -> city for every city in cities as one (k, n, n) array.
+    Returns the reduced children and how much each child's lower bound goes up.
+    """
+    children, move_costs = child_matrices(graph, last, cities)
+    children, extra = reduction_batch(children)
+    return children, move_costs + extra
+
+
+class ReducedMatrix:
+    """
+    A single reduced-cost matrix that is branched on in place.
+
+    Every cell that `branch` changes is saved to an undo log first,
+    so a depth-first search can back out of a child with `undo(mark)`
+    instead of keeping a copy of the matrix for every node.
+
+    row_arg[i] is a column where row i is 0 (-1 if the row is all inf),
+    and col_arg[j] is a row where column j is 0 (-1 if the column is all inf);
+    both are plain lists, which are cheaper than arrays to search and update one entry at a time.
+    Taking last -> nxt can only raise the minimum of rows whose zero was in column nxt
+    and of columns whose zero was in row last, so only those are rescanned.
+
+    lower_bound is the bound of the matrix it was built from;
+    callers add the increases returned by `branch` themselves.
+    """
+
+    def __init__(self, edges):
+        graph = np.array(edges, dtype=float)
+        np.fill_diagonal(graph, inf)
+        self.graph, self.lower_bound = reduction_array(graph, inplace=True)
+        self.row_arg = _argmin_or_missing(self.graph, axis=1).tolist()
+        self.col_arg = _argmin_or_missing(self.graph, axis=0).tolist()
+        self._log = []
+
+    def copy(self) -> 'ReducedMatrix':
+        """A copy of the current matrix with an empty undo log"""
+        other = ReducedMatrix.__new__(ReducedMatrix)
+        other.graph = self.graph.copy()
+        other.lower_bound = self.lower_bound
+        other.row_arg = list(self.row_arg)
+        other.col_arg = list(self.col_arg)
+        other._log = []
+        return other
+
+    def mark(self) -> int:
+        return len(self._log)
+
+    def undo(self, mark: int):
+        log = self._log
+        for _ in range(len(log) - mark):
+            array, key, old = log.pop()
+            array[key] = old
+
+    def branch(self, last: int, nxt: int) -> float:
+        """
+        Take the edge last -> nxt.
+        Returns how much the lower bound goes up: the edge's reduced cost plus the extra reduction.
+        """
+        graph = self.graph
+        row_arg = self.row_arg
+        col_arg = self.col_arg
+        log = self._log
+        move_cost = graph[last, nxt]
+
+        # Only the argmin entries that change are logged, one at a time
+        log.append((row_arg, last, row_arg[last]))
+        log.append((col_arg, nxt, col_arg[nxt]))
+        row_arg[last] = -1
+        col_arg[nxt] = -1
+        rows = _positions(row_arg, nxt)
+        if row_arg[nxt] == last:
+            rows.append(nxt)
+        cols = _positions(col_arg, last)
+        if col_arg[last] == nxt:
+            cols.append(last)
+
+        log.append((graph, last, graph[last].copy()))
+        log.append((graph, (slice(None), nxt), graph[:, nxt].copy()))
+        log.append((graph, (nxt, last), graph[nxt, last]))
+        graph[last] = inf
+        graph[:, nxt] = inf
+        graph[nxt, last] = inf
+
+        # Rows first, then columns (rows of the transpose), as in a full reduction
+        extra = 0
+        for matrix, arg, lines in ((graph, row_arg, rows), (graph.T, col_arg, cols)):
+            for i in lines:
+                line = matrix[i]
+                j = line.argmin()
+                smallest = line[j]
+                log.append((arg, i, arg[i]))
+                if smallest == inf:
+                    arg[i] = -1
+                    continue
+                arg[i] = int(j)
+                if smallest != 0:
+                    log.append((matrix, i, line.copy()))
+                    line -= smallest
+                    extra += smallest
+
+        return float(move_cost + extra)
+
+
+def _positions(values: list[int], target: int) -> list[int]:
+    """The indices of target in values, found with list.count and list.index rather than a Python loop"""
+    positions = []
+    i = -1
+    for _ in range(values.count(target)):
+        i = values.index(target, i + 1)
+        positions.append(i)
+    return positions
+
+
+def _argmin_or_missing(graph: np.ndarray, axis: int) -> np.ndarray:
+    arg = graph.argmin(axis=axis)
+    arg[np.isinf(graph.min(axis=axis))] = -1
+    return arg
+
+
+def choosing_edge(graph: np.ndarray):
+    """
+    Pick the zero-cost edge whose exclusion would raise the bound the most (Little's rule).
+    Excluding (i, j) costs the next-smallest entry of row i plus that of column j.
+    Returns (i, j, penalty), or None if the matrix has no zero-cost edge left.
+    """
+    rows, cols = np.nonzero(graph == 0)
+    if not rows.size:
+        return None
+
+    row_second = np.partition(graph, 1, axis=1)[:, 1]
+    col_second = np.partition(graph, 1, axis=0)[1, :]
+    penalties = row_second[rows] + col_second[cols]
+
+    best = int(penalties.argmax())
+    return int(rows[best]), int(cols[best]), float(penalties[best])
+
+
+class EdgeNode:
+    """
+    A node of Little's edge-branching B&B.
+
+    graph is the node's reduced matrix, succ[i] is the city chosen to follow i (-1 if none yet).
+    The included edges form path fragments; frag_end[s] is the last city of the fragment
+    starting at s and frag_start[e] the first city of the fragment ending at e.
+    Whenever a fragment grows, its closing edge end -> start is set to inf,
+    so no subtour can be formed before all n edges are chosen.
+    """
+    __slots__ = ('graph', 'bound', 'succ', 'frag_start', 'frag_end', 'n_included')
+
+    def __init__(self, graph, bound, succ, frag_start, frag_end, n_included):
+        self.graph = graph
+        self.bound = bound
+        self.succ = succ
+        self.frag_start = frag_start
+        self.frag_end = frag_end
+        self.n_included = n_included
+
+    @staticmethod
+    def root(edges) -> 'EdgeNode':
+        graph = np.array(edges, dtype=float)
+        np.fill_diagonal(graph, inf)
+        n = len(graph)
+        cities = np.arange(n)
+        node = EdgeNode(graph, 0, np.full(n, -1), cities.copy(), cities.copy(), 0)
+        node.bound = node._reduce()
+        return node
+
+    def is_complete(self) -> bool:
+        return self.n_included == len(self.graph)
+
+    def include(self, i: int, j: int) -> 'EdgeNode':
+        graph = self.graph.copy()
+        graph[i, :] = inf
+        graph[:, j] = inf
+
+        succ = self.succ.copy()
+        succ[i] = j
+        frag_start = self.frag_start.copy()
+        frag_end = self.frag_end.copy()
+        start, end = frag_start[i], frag_end[j]
+        frag_end[start] = end
+        frag_start[end] = start
+
+        child = EdgeNode(graph, self.bound, succ, frag_start, frag_end, self.n_included + 1)
+        if child.n_included < len(graph) - 1:
+            graph[end, start] = inf
+        child.bound += child._reduce()
+        return child
+
+    def exclude(self, i: int, j: int) -> 'EdgeNode':
+        graph = self.graph.copy()
+        graph[i, j] = inf
+        child = EdgeNode(graph, self.bound, self.succ, self.frag_start, self.frag_end, self.n_included)
+        child.bound += child._reduce()
+        return child
+
+    def _reduce(self) -> float:
+        if self.is_complete():
+            return 0
+        self.graph, extra = reduction_array(self.graph, inplace=True)
+
+        # A city that still needs an edge out (or in) but has none left makes the node infeasible
+        free_rows = self.succ == -1
+        free_cols = np.ones(len(self.graph), dtype=bool)
+        free_cols[self.succ[~free_rows]] = False
+        if np.isinf(self.graph[free_rows].min(axis=1)).any() or np.isinf(self.graph[:, free_cols].min(axis=0)).any():
+            return inf
+        return extra
+
+    def tour(self) -> list[int]:
+        tour = [0]
+        while len(tour) < len(self.succ):
+            tour.append(int(self.succ[tour[-1]]))
+        return tour
 
 
 def main():
@@ -0,0 +1,113 @@
+import numpy as np
+
+from tsp_core import SolutionStats, Timer
+from tsp_cuttree import CutTree
+from tsp_solve import greedy_tour, dfs
+from tsp_stats import add_stats, empty_stats
+
+
+def tour_costs(graph: np.ndarray, population: np.ndarray) -> np.ndarray:
+    """Cost of every tour in a (P, n) population, with one gather over the edge matrix"""
+    return graph[population, np.roll(population, -1, axis=1)].sum(axis=1)
+
+
+def order_crossover(first: np.ndarray, second: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Order crossover (OX) of two (P, n) arrays of parents, one child per row.
+
+    Each child copies a random slice [a, b) of its first parent, and fills the other
+    positions (from b onwards, wrapping around) with the missing cities in the order
+    they appear in its second parent, also read from b onwards.
+    """
+    p, n = first.shape
+    rows = np.arange(p)[:, None]
+    positions = np.arange(n)
+
+    cuts = np.sort(rng.integers(0, n + 1, size=(p, 2)), axis=1)
+    a, b = cuts[:, :1], cuts[:, 1:]
+    in_slice = (positions >= a) & (positions < b)
+
+    taken = np.zeros((p, n), dtype=bool)
+    taken[rows, first] = in_slice
+
+    # Positions and second-parent cities, both read from b onwards;
+    # each row has the same number of free positions as missing cities
+    from_b = (b + positions) % n
+    fill_positions = from_b[~in_slice[rows, from_b]]
+    donors = second[rows, from_b]
+    fill_cities = donors[~taken[rows, donors]]
+
+    children = np.where(in_slice, first, 0)
+    fill_rows = np.repeat(np.arange(p), n - in_slice.sum(axis=1))
+    children[fill_rows, fill_positions] = fill_cities
+    return children
+
+
+def reverse_segments(population: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Apply one random 2-opt move (reversing the slice [i, j]) to every tour in population"""
+    p, n = population.shape
+    cuts = np.sort(rng.integers(0, n, size=(p, 2)), axis=1)
+    i, j = cuts[:, :1], cuts[:, 1:]
+    positions = np.arange(n)
+    source = np.where((positions >= i) & (positions <= j), i + j - positions, positions)
+    return population[np.arange(p)[:, None], source]
+
+
+def tournament(fitness: np.ndarray, count: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Indices of count winners of tournaments between size random individuals"""
+    entrants = rng.integers(0, len(fitness), size=(count, size))
+    return entrants[np.arange(count), fitness[entrants].argmin(axis=1)]
+
+
+def genetic(edges: list[list[float]], timer: Timer, population_size: int = 100, elite: int = 2,
+            tournament_size: int = 3, mutation_rate: float = 0.3, seed: int = None) -> list[SolutionStats]:
+    """
+    Genetic algorithm over a (population_size, n) array of tours.
+
+    Each generation keeps the elite best tours, and breeds the rest from tournament-selected
+    parents with order crossover. A mutation_rate share of the children get a random 2-opt move
+    (0 turns mutation off). The first population is random apart from the greedy tour.
+    The elite is capped at the population size.
+    """
+
+    if population_size < 1:
+        raise ValueError(f'population_size must be at least 1, got {population_size}')
+    elite = min(elite, population_size)
+
+    n = len(edges)
+    if n < 3:
+        return dfs(edges, timer)
+
+    graph = np.asarray(edges, dtype=float)
+    rng = np.random.default_rng(seed)
+    population = rng.random((population_size, n)).argsort(axis=1)
+    start = [st for st in greedy_tour(edges, timer.child(timer.time_limit * 0.1)) if st.tour]
+    if start:
+        population[0] = start[-1].tour
+
+    stats = []
+    cut_tree = CutTree(n)
+    bssf_cost = np.inf
+    n_children = 0
+    n_breed = population_size - elite
+
+    while not timer.time_out():
+        fitness = tour_costs(graph, population)
+        best = int(fitness.argmin())
+        if fitness[best] < bssf_cost:
+            stats, bssf_cost = add_stats(stats, timer, n_children, 0, cut_tree,
+                                         "local search", population[best].tolist(), edges, bssf_cost)
+
+        survivors = population[np.argsort(fitness)[:elite]]
+        first = population[tournament(fitness, n_breed, tournament_size, rng)]
+        second = population[tournament(fitness, n_breed, tournament_size, rng)]
+        children = order_crossover(first, second, rng)
+
+        mutants = rng.random(n_breed) < mutation_rate
+        if mutants.any():
+            children[mutants] = reverse_segments(children[mutants], rng)
+
+        population = np.concatenate((survivors, children))
+        n_children += n_breed
+
+    return stats or empty_stats(timer, edges)
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+
+from tsp_core import SolutionStats, Timer, score_tour
+from tsp_stats import empty_stats
+
+# How much RAM held_karp is allowed to use for its tables, in bytes
+MEMORY_LIMIT = 2 * 1024 ** 3
+
+# Bytes per (subset, last city) state: a float64 cost and an int8 parent
+_BYTES_PER_STATE = 8 + 1
+
+
+def held_karp_memory(n: int) -> int:
+    """
+    Bytes needed by held_karp for n cities: the DP tables plus the largest temporaries,
+    which come either from counting subset sizes or from the largest step of the fill.
+    It is an estimate, a few percent over the measured peak, and leaves out the fixed overhead
+    that only matters for small n.
+    City 0 is always the start, so subsets are over the other n - 1 cities.
+    """
+    if n < 2:
+        return 0
+    m = n - 1
+    subsets = 1 << m
+    tables = subsets * m * _BYTES_PER_STATE
+
+    # _popcounts: the int64 masks, two int64 temporaries of (masks >> b) & 1, and the int8 counts
+    popcount = subsets * (3 * 8 + 1)
+    # The fill: the counts and the bool mask of a layer, the layer's masks and the three temporaries
+    # that pick out one last city's masks, then, for those masks, the candidates (m floats each)
+    # and four int64 vectors (masks, previous masks, argmin and index).
+    # The last city's arrays are still alive while the next one's are made, so those count twice.
+    layer = math.comb(m, m // 2)
+    ending = math.comb(m - 1, (m - 1) // 2)
+    fill = subsets * 2 + layer * (3 * 8 + 1) + 2 * ending * (m * 8 + 4 * 8)
+    return tables + max(popcount, fill)
+
+
+def _popcounts(n_bits: int) -> np.ndarray:
+    masks = np.arange(1 << n_bits)
+    counts = np.zeros(1 << n_bits, dtype=np.int8)
+    for b in range(n_bits):
+        counts += (masks >> b) & 1
+    return counts
+
+
+def held_karp(edges: list[list[float]], timer: Timer, memory_limit: int = MEMORY_LIMIT) -> list[SolutionStats]:
+    """
+    Exact bitmask DP over (subset of visited cities, last city).
+
+    cost[mask, j] is the cheapest path that starts at city 0,
+    visits exactly the cities in mask (bit j-1 stands for city j) and ends at city j.
+    Each subset size is filled in from the previous one with one vectorized step per last city.
+    Raises ValueError if the tables would not fit in memory_limit bytes.
+    """
+
+    n = len(edges)
+    needed = held_karp_memory(n)
+    if needed > memory_limit:
+        raise ValueError(f'held_karp needs {needed} bytes for n={n}, '
+                         f'more than the limit of {memory_limit} bytes')
+
+    if n == 0:
+        return empty_stats(timer, edges)
+    if n == 1:
+        return [SolutionStats([0], score_tour([0], edges), timer.time(), 1, 1, 0, 1, 1.0)]
+
+    graph = np.array(edges, dtype=float)
+    m = n - 1
+    full = (1 << m) - 1
+    sub = graph[1:, 1:]
+
+    cost = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int8)
+    for j in range(m):
+        cost[1 << j, j] = graph[0, j + 1]
+
+    counts = _popcounts(m)
+    for size in range(2, m + 1):
+        if timer.time_out():
+            return empty_stats(timer, edges)
+
+        layer = np.flatnonzero(counts == size)
+        for j in range(m):
+            masks = layer[(layer >> j) & 1 == 1]
+            candidates = cost[masks ^ (1 << j)]
+            candidates += sub[:, j]
+            best = candidates.argmin(axis=1)
+            cost[masks, j] = candidates[np.arange(masks.size), best]
+            parent[masks, j] = best
+
+    closing = cost[full] + graph[1:, 0]
+    last = int(closing.argmin())
+    if math.isinf(closing[last]):
+        return empty_stats(timer, edges)
+
+    tour = []
+    mask = full
+    while last != -1:
+        tour.append(last + 1)
+        mask, last = mask ^ (1 << last), int(parent[mask, last])
+    tour.append(0)
+    tour.reverse()
+
+    n_states = (1 << m) * m
+    return [SolutionStats(
+        tour=tour,
+        score=score_tour(tour, edges),
+        time=timer.time(),
+        max_queue_size=1,
+        n_nodes_expanded=n_states,
+        n_nodes_pruned=0,
+        n_leaves_covered=math.factorial(m),
+        fraction_leaves_covered=1.0
+    )]
@@ -0,0 +1,204 @@
+import random
+from collections import deque
+
+import numpy as np
+from math import inf
+
+from tsp_core import SolutionStats, Timer, score_tour
+from tsp_cuttree import CutTree
+from tsp_stats import add_stats
+from tsp_local_search import (ArrayTour, neighbour_lists, is_symmetric, improve, greedy_start,
+                              starting_tour, outside_tour, or_opt_improve, three_opt_improve)
+
+# Share of the time limit given to building the starting tour
+CONSTRUCT_FRACTION = 0.1
+
+# Improvements are reported at most this often (in seconds), plus once at the end,
+# so large instances do not store a copy of the tour for every small gain
+REPORT_INTERVAL = 0.1
+
+_TIMER_CHECK_INTERVAL = 64
+_EPSILON = 1e-9
+
+
+class LinKernighan:
+    """
+    Lin-Kernighan local search on a symmetric instance, with moves built from 2-opt steps.
+
+    From a base city t1 and its tour neighbour t2, each step breaks (t1, t2),
+    joins t2 to a candidate t3 from t2's nearest cities while the running gain stays positive,
+    breaks (t4, t3) and closes the tour with (t4, t1). That is a 2-opt move, so the tour is
+    always valid; the chain continues from t4 up to max_depth steps, and is rolled back to
+    the step with the best closed gain. Edges added in a chain are never removed in it.
+    """
+
+    def __init__(self, graph: np.ndarray, tour: list[int], neighbours: np.ndarray, max_depth: int = 50):
+        self.graph = graph
+        self.n = len(tour)
+        self.near = neighbours.tolist()
+        self.near_cost = np.take_along_axis(graph, neighbours, axis=1).tolist()
+        self.max_depth = max_depth
+        self.tour = ArrayTour(tour)
+        self.n_moves = 0
+        self.n_rolled_back = 0
+
+    def _move(self, a: int, b: int, c: int, d: int):
+        """2-opt: b follows a and d follows c (in the same direction); replace a-b, c-d with a-c, b-d"""
+        if self.tour.succ(a) == b:
+            self.tour.reverse(b, c)
+        else:
+            self.tour.reverse(c, b)
+
+    def step(self, t1: int) -> tuple[float, set[int]]:
+        """Try to improve the tour starting from t1. Returns the gain and the cities touched."""
+        graph = self.graph
+        tour = self.tour
+
+        for t2 in (tour.succ(t1), tour.pred(t1)):
+            gain = graph[t1, t2]
+            moves = []
+            added = set()
+            removed = {(min(t1, t2), max(t1, t2))}
+            best_gain = _EPSILON
+            best_length = 0
+
+            for _ in range(self.max_depth):
+                forward = tour.succ(t1) == t2
+                choice = None
+                best_value = -inf
+                for t3, d23 in zip(self.near[t2], self.near_cost[t2]):
+                    partial = gain - d23
+                    if not partial > _EPSILON:
+                        break
+                    t4 = tour.pred(t3) if forward else tour.succ(t3)
+                    if t3 == t1 or t4 == t2:
+                        continue
+                    if (min(t2, t3), max(t2, t3)) in removed or (min(t3, t4), max(t3, t4)) in added:
+                        continue
+                    value = partial + graph[t4, t3]
+                    if value > best_value:
+                        best_value = value
+                        choice = (t3, t4)
+
+                if choice is None:
+                    break
+                t3, t4 = choice
+                self._move(t1, t2, t4, t3)
+                moves.append((t2, t3, t4))
+                added.add((min(t2, t3), max(t2, t3)))
+                removed.add((min(t3, t4), max(t3, t4)))
+
+                gain = best_value
+                closed = gain - graph[t4, t1]
+                if closed > best_gain:
+                    best_gain = closed
+                    best_length = len(moves)
+                t2 = t4
+
+            touched = {t1}
+            while len(moves) > best_length:
+                t2, t3, t4 = moves.pop()
+                self._move(t1, t4, t2, t3)
+                self.n_rolled_back += 1
+            for t2, t3, t4 in moves:
+                touched.update((t2, t3, t4))
+
+            if moves:
+                self.n_moves += len(moves)
+                return best_gain, touched
+
+        return 0, set()
+
+    def optimize(self, queue: deque, timer: Timer) -> float:
+        """Run steps from the cities in queue (don't-look bits) until none improves. Returns the total gain."""
+        queued = [False] * self.n
+        for city in queue:
+            queued[city] = True
+
+        total = 0
+        pops = 0
+        with np.errstate(invalid='ignore'):
+            while queue:
+                pops += 1
+                if pops % _TIMER_CHECK_INTERVAL == 0 and timer.time_out():
+                    break
+
+                t1 = queue.popleft()
+                queued[t1] = False
+                gain, touched = self.step(t1)
+                if not gain:
+                    continue
+                total += gain
+                for city in touched:
+                    if not queued[city]:
+                        queued[city] = True
+                        queue.append(city)
+        return total
+
+    def double_bridge(self, rng: random.Random) -> list[int]:
+        """Perturb the tour with a random double-bridge (A B C D -> A C B D). Returns the 8 endpoints."""
+        i, j, k = sorted(rng.sample(range(1, self.n), 3))
+        order = self.tour.order
+        ends = [order[p].item() for p in (0, i - 1, i, j - 1, j, k - 1, k, self.n - 1)]
+        self.tour = ArrayTour(np.concatenate((order[:i], order[j:k], order[i:j], order[k:])))
+        return ends
+
+
+def lin_kernighan(edges: list[list[float]], timer: Timer, k: int = 8, max_depth: int = 50,
+                  seed: int = None) -> list[SolutionStats]:
+    """
+    Chained Lin-Kernighan: greedy start, LK to a local optimum, then double-bridge kicks
+    (each followed by LK from the kicked cities), keeping a kick only if it improves the tour.
+    A better tour found outside (Timer.best_tour) replaces the starting tour or the current best.
+    Asymmetric instances fall back to Or-opt and segment-exchange 3-opt.
+    """
+
+    n = len(edges)
+    stats = starting_tour(greedy_start, edges, timer, timer.time_limit * CONSTRUCT_FRACTION)
+
+    graph = np.asarray(edges, dtype=float)
+    if n < 8:
+        return improve(edges, timer, stats)
+    if not is_symmetric(graph):
+        return improve(edges, timer, stats, (or_opt_improve, three_opt_improve))
+
+    tour = stats[-1].tour
+    search = LinKernighan(graph, tour, neighbour_lists(graph, k), max_depth)
+    rng = random.Random(seed)
+    cut_tree = CutTree(n)
+    bssf_cost = stats[-1].score
+    last_report = -inf
+
+    def report(order):
+        nonlocal stats, bssf_cost, last_report
+        stats, bssf_cost = add_stats(stats, timer, search.n_moves, search.n_rolled_back,
+                                     cut_tree, "local search", order.tolist(), edges, bssf_cost)
+        last_report = timer.time()
+
+    best_cost = score_tour(tour, edges) - search.optimize(deque(tour), timer)
+    best_order = search.tour.order.copy()
+    report(best_order)
+
+    while not timer.time_out():
+        # Carry on from a better tour found outside (e.g. by another portfolio solver)
+        if timer.upper_bound() < best_cost - _EPSILON:
+            outside = outside_tour(edges, timer, stats[-1:])
+            if len(outside) > 1:
+                best_cost = bssf_cost = outside[-1].score
+                best_order = np.array(outside[-1].tour)
+                search.tour = ArrayTour(best_order)
+
+        ends = search.double_bridge(rng)
+        cost = score_tour(search.tour.order.tolist(), edges)
+        cost -= search.optimize(deque(ends), timer)
+
+        if cost < best_cost - _EPSILON:
+            best_cost = cost
+            best_order = search.tour.order.copy()
+            if timer.time() - last_report >= REPORT_INTERVAL:
+                report(best_order)
+        else:
+            search.tour = ArrayTour(best_order)
+
+    report(best_order)
+    return stats
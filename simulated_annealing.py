@@ -0,0 +1,184 @@
+import math
+import random
+from typing import Callable
+
+import numpy as np
+
+from tsp_core import SolutionStats, Timer, score_tour
+from tsp_cuttree import CutTree
+from tsp_local_search import is_symmetric
+from tsp_solve import dfs
+from tsp_stats import add_stats, empty_stats
+
+# Temperature as a fraction of the starting temperature, given the fraction of the run that is done
+Schedule = Callable[[float], float]
+
+# Improvements are reported at most this often (in seconds), plus once at the end
+REPORT_INTERVAL = 0.1
+
+_TIMER_CHECK_INTERVAL = 1024
+
+# Moves sampled to pick the starting temperature
+_TEMPERATURE_SAMPLES = 200
+
+
+def exponential_cooling(final: float = 1e-3) -> Schedule:
+    """Geometric cooling from 1 down to final"""
+    return lambda done: final ** done
+
+
+def linear_cooling(done: float) -> float:
+    return 1 - done
+
+
+def _swap_delta(g, tour, i, j):
+    """Cost change of swapping the cities at positions i < j (not the pair 0, n - 1)"""
+    n = len(tour)
+    a, b = tour[i], tour[j]
+    before, after = tour[i - 1], tour[(j + 1) % n]
+    if j == i + 1:
+        return g[before][b] + g[b][a] + g[a][after] - g[before][a] - g[a][b] - g[b][after]
+    a_next, b_prev = tour[i + 1], tour[j - 1]
+    return (g[before][b] + g[b][a_next] + g[b_prev][a] + g[a][after]
+            - g[before][a] - g[a][a_next] - g[b_prev][b] - g[b][after])
+
+
+def _insert_delta(g, tour, i, j):
+    """Cost change of moving the city at position i to between positions j and j + 1"""
+    n = len(tour)
+    a, before, after = tour[i], tour[i - 1], tour[(i + 1) % n]
+    u, v = tour[j], tour[(j + 1) % n]
+    return g[before][after] - g[before][a] - g[a][after] + g[u][a] + g[a][v] - g[u][v]
+
+
+def _reverse_delta(g, tour, i, j):
+    """Cost change of reversing positions i..j (i < j) of a tour on a symmetric matrix"""
+    n = len(tour)
+    before, first, last, after = tour[i - 1], tour[i], tour[j], tour[(j + 1) % n]
+    return g[before][last] + g[first][after] - g[before][first] - g[last][after]
+
+
+def _insert(tour, i, j):
+    city = tour[i]
+    if i < j:
+        tour[i:j] = tour[i + 1:j + 1]
+        tour[j] = city
+    else:
+        tour[j + 2:i + 1] = tour[j + 1:i]
+        tour[j + 1] = city
+
+
+def simulated_annealing(edges: list[list[float]], timer: Timer,
+                        schedule: Schedule = exponential_cooling(), restarts: int = 4,
+                        start_temperature: float = None, seed: int = None) -> list[SolutionStats]:
+    """
+    Simulated annealing over swap, insert and reversal moves, each scored in O(1).
+
+    The time limit is split into restarts + 1 runs. Every run starts from the best tour so far,
+    reheats to start_temperature (by default, the median uphill cost of some random moves)
+    and cools along schedule as its share of the time passes.
+    Reversals change the direction of the inner edges, so they are only used on symmetric matrices.
+    Missing edges (inf) are replaced by a penalty larger than any finite tour,
+    so the search can pass through infeasible tours, but only finite ones are reported.
+    """
+
+    n = len(edges)
+    if n < 4:
+        return dfs(edges, timer)
+
+    graph = np.array(edges, dtype=float)
+    symmetric = is_symmetric(graph)
+    finite = np.isfinite(graph)
+    if not finite.any():
+        return empty_stats(timer, edges)
+    penalty = float(np.abs(graph[finite]).max()) * n + 1
+    graph[~finite] = penalty
+    g = graph.tolist()
+
+    rng = random.Random(seed)
+    moves = [_swap_delta, _insert_delta]
+    if symmetric:
+        moves.append(_reverse_delta)
+
+    def random_move(tour):
+        move = rng.choice(moves)
+        i, j = rng.randrange(n), rng.randrange(n)
+        if move is _insert_delta:
+            if j == i or j == (i - 1) % n:
+                return None
+        else:
+            i, j = min(i, j), max(i, j)
+            if i == j or (i == 0 and j == n - 1):
+                return None
+        return move, i, j
+
+    tour = rng.sample(range(n), n)
+    cost = score_tour(tour, g)
+    if start_temperature is None:
+        uphill = []
+        for _ in range(_TEMPERATURE_SAMPLES):
+            move = random_move(tour)
+            if move is not None:
+                delta = move[0](g, tour, move[1], move[2])
+                # Moves that add a missing edge would set the temperature by the penalty
+                if 0 < delta < penalty / 2:
+                    uphill.append(delta)
+        start_temperature = float(np.median(uphill)) if uphill else 1.0
+
+    stats = []
+    cut_tree = CutTree(n)
+    bssf_cost = math.inf
+    best_tour, best_cost = tour[:], cost
+    n_tried = n_rejected = 0
+    last_report = -math.inf
+
+    def report():
+        nonlocal stats, bssf_cost, last_report
+        stats, bssf_cost = add_stats(stats, timer, n_tried, n_rejected, cut_tree,
+                                     "local search", best_tour[:], edges, bssf_cost)
+        last_report = timer.time()
+
+    for run in range(restarts + 1):
+        run_start = timer.time()
+        run_length = (timer.time_limit - run_start) / (restarts + 1 - run)
+        tour, cost = best_tour[:], score_tour(best_tour, g)
+        temperature = start_temperature
+
+        while True:
+            n_tried += 1
+            if n_tried % _TIMER_CHECK_INTERVAL == 0:
+                if timer.time_out():
+                    break
+                done = (timer.time() - run_start) / run_length
+                if done >= 1:
+                    break
+                temperature = start_temperature * schedule(done)
+
+            move = random_move(tour)
+            if move is None:
+                n_rejected += 1
+                continue
+            delta_of, i, j = move
+            delta = delta_of(g, tour, i, j)
+            if delta > 0 and (temperature <= 0 or rng.random() >= math.exp(-delta / temperature)):
+                n_rejected += 1
+                continue
+
+            if delta_of is _swap_delta:
+                tour[i], tour[j] = tour[j], tour[i]
+            elif delta_of is _insert_delta:
+                _insert(tour, i, j)
+            else:
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+            cost += delta
+
+            if cost < best_cost - 1e-9:
+                best_tour, best_cost = tour[:], cost
+                if timer.time() - last_report >= REPORT_INTERVAL:
+                    report()
+
+        if timer.time_out():
+            break
+
+    report()
+    return stats or empty_stats(timer, edges)
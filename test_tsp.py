@@ -1,10 +1,34 @@
+import json
 import math
+import pickle
+import random
+import tracemalloc
+
+import numpy as np
+import pytest
 
 from byu_pytest_utils import max_score
-from tsp_core import Timer, generate_network, score_tour
+from tsp_core import Timer, generate_network, score_tour, DistanceMatrix
 from math import inf
 
-from tsp_solve import greedy_tour, dfs, branch_and_bound, branch_and_bound_smart
+from tsp_solve import (random_tour, greedy_tour, dfs, branch_and_bound, branch_and_bound_smart, branch_and_bound_inplace,
+                       branch_and_bound_edges)
+from branch_and_bound import reduction, reduction_array, expand_children, ReducedMatrix
+from tsp_search import SearchNode
+from tsp_frontier import Frontier, lower_bound
+from tsp_cuttree import CutTree
+from held_karp import held_karp, held_karp_memory
+from tsp_bounds import OneTreeBound
+from tsp_local_search import two_opt, or_opt, improve
+from lin_kernighan import lin_kernighan
+from simulated_annealing import simulated_annealing
+from genetic import genetic, order_crossover
+from ant_colony import ant_colony
+from tsp_parallel import branch_and_bound_parallel
+from tsp_portfolio import portfolio
+from tsp_stream import streaming, collect
+from tsp_instrument import Instruments
+from tsp_sparse import SparseGraph, sparse_greedy, sparse_dfs, sparse_branch_and_bound
 
 """ 
 ---- IMPORTANT ----
@@ -33,6 +57,174 @@ def assert_valid_tours(edges, stats):
         assert_valid_tour(edges, stat.tour)
 
 
+def test_reduction_array():
+    graph = [
+        [inf, inf, inf, inf],
+        [0, inf, inf, 10],
+        [inf, inf, inf, inf],
+        [6, inf, inf, inf]
+    ]
+    expected_graph, expected_lb = reduction(graph)
+
+    reduced, lower_bound = reduction_array(graph)
+    assert lower_bound == expected_lb == 16
+    assert reduced.tolist() == expected_graph
+
+
+def test_expand_children():
+    locations, edges = generate_network(10, euclidean=True, reduction=0.2, seed=312)
+    graph, _ = reduction_array(edges)
+    for i in range(len(graph)):
+        graph[i, i] = inf
+    cities = list(range(1, len(graph)))
+
+    children, increases = expand_children(graph, 0, cities)
+    for city, child, increase in zip(cities, children, increases):
+        expected = graph.copy()
+        move_cost = expected[0, city]
+        expected[0, :] = inf
+        expected[:, city] = inf
+        expected[city, 0] = inf
+        expected, extra = reduction_array(expected)
+
+        assert math.isclose(increase, move_cost + extra)
+        assert (child == expected).all()
+
+
+def test_reduced_matrix():
+    """Branching in place should match copy + full reduction, and undo should restore everything"""
+    locations, edges = generate_network(12, euclidean=True, reduction=0.2, seed=312)
+    matrix = ReducedMatrix(edges)
+    start = matrix.graph.copy(), list(matrix.row_arg), list(matrix.col_arg)
+
+    path = [0, 3, 4, 7]
+    for last, nxt in zip(path, path[1:]):
+        expected = matrix.graph.copy()
+        move_cost = expected[last, nxt]
+        expected[last, :] = inf
+        expected[:, nxt] = inf
+        expected[nxt, last] = inf
+        expected, extra = reduction_array(expected)
+
+        increase = matrix.branch(last, nxt)
+        assert increase < inf and math.isclose(increase, move_cost + extra)
+        assert (matrix.graph == expected).all()
+        assert all(matrix.graph[i, j] == 0 for i, j in enumerate(matrix.row_arg) if j >= 0)
+        assert all(matrix.graph[i, j] == 0 for j, i in enumerate(matrix.col_arg) if i >= 0)
+
+    matrix.undo(0)
+    assert (matrix.graph == start[0]).all()
+    assert (matrix.row_arg, matrix.col_arg) == start[1:]
+
+
+def test_search_node():
+    root = SearchNode.root(0, 0)
+    node = root.child(3, 2.5, 1).child(1, 1.5, 2)
+
+    assert node.path() == [0, 3, 1]
+    assert node.depth == 3
+    # Paths live in the search's shared arena, so a node holds an index, not its parent
+    assert node.arena is root.arena
+    assert root.child(2, 0, 0).path() == [0, 2]
+    assert node.cost == 4
+    assert node.unvisited(5) == [2, 4]
+    assert not node.is_complete(5)
+    assert node.child(2, 0, 0).child(4, 0, 0).is_complete(5)
+
+
+def test_frontier():
+    frontier = Frontier(lower_bound)
+    root = SearchNode.root(0, 5)
+    first, second, third = root.child(1, 0, 3), root.child(2, 0, 3), root.child(3, 0, 1)
+    for node in (root, first, second, third):
+        frontier.push(node)
+
+    assert frontier.max_size == 4
+    assert [frontier.pop() for _ in range(4)] == [third, first, second, root]
+    assert not frontier
+
+
+def test_cut_tree():
+    cut_tree = CutTree(5)
+    cut_tree.cut([0, 1, 2])
+    cut_tree.cut([0, 1, 2, 3])
+    assert cut_tree.n_leaves_cut() == 2
+
+    # Cutting every child of [0, 1] collapses it
+    cut_tree.cut_children([0, 1], [3, 4])
+    assert cut_tree.n_leaves_cut() == 6
+    assert cut_tree.head.children[0].children[1].is_terminal_node
+    assert not cut_tree.head.children[0].children[1].children
+
+    cut_tree.cut([0])
+    assert cut_tree.fraction_leaves_covered() == 1
+    assert cut_tree.head.children[0].is_terminal_node
+
+    # Sampling mode: deeper cuts are counted at max_depth
+    sampled = CutTree(6, max_depth=2)
+    sampled.cut([0, 1, 2, 3])
+    sampled.cut_children([0, 2, 1], [3, 4, 5])
+    assert sampled.n_leaves_cut() == 2 + 6
+    assert not sampled.head.children[0].children[1].children
+
+
+def test_distance_matrix():
+    _, edges = generate_network(8, euclidean=True, reduction=0.2, seed=2)
+    matrix = DistanceMatrix(edges)
+
+    assert len(matrix) == 8
+    assert matrix.to_lists() == edges
+    assert matrix[1][2] == edges[1][2]
+    assert np.asarray(matrix) is matrix.array
+    assert not matrix.array.flags.writeable
+    assert score_tour(list(range(8)), matrix) == score_tour(list(range(8)), edges)
+    assert greedy_tour(matrix, Timer(5))[-1].score == greedy_tour(edges, Timer(5))[-1].score
+    assert dfs(matrix, Timer(5))[-1].score == dfs(edges, Timer(5))[-1].score
+
+    with DistanceMatrix.shared(edges, np.float32) as shared:
+        # Pickled as the name of the shared block, not the weights
+        assert len(pickle.dumps(shared)) < len(pickle.dumps(DistanceMatrix(edges, np.float32)))
+        attached = pickle.loads(pickle.dumps(shared))
+        assert attached.to_lists() == shared.to_lists()
+        attached.close()
+    assert shared.to_lists() == DistanceMatrix(edges, np.float32).to_lists()
+
+
+def test_generate_network():
+    # The original implementation, drawing from the random module
+    rng = random.Random(7)
+    locations = [(rng.random(), rng.random()) for _ in range(30)]
+    expected = [[inf if rng.random() < 0.2 else round(math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2), 3)
+                 for b in locations] for a in locations]
+
+    state = random.getstate()
+    assert generate_network(30, seed=7, reduction=0.2)[1] == expected
+    assert random.getstate() == state
+
+    _, edges = generate_network(30, seed=7, reduction=0.2, euclidean=False, reproducible=False)
+    assert edges == generate_network(30, seed=7, reduction=0.2, euclidean=False, reproducible=False)[1]
+    assert len(edges) == 30 and inf in edges[0] + edges[1] + edges[2]
+
+    _, matrix = generate_network(30, seed=7, reduction=0.2, matrix=True)
+    assert matrix.to_lists() == expected
+
+
+def test_sparse():
+    locations, edges = generate_network(9, euclidean=True, reduction=0.6, seed=38)
+    graph = SparseGraph.from_edges(edges)
+
+    assert graph.n_edges == sum(not math.isinf(edges[i][j]) for i in range(9) for j in range(9) if i != j)
+    assert all(graph[i][j] == edges[i][j] for i in range(9) for j in range(9))
+
+    timer = Timer(10)
+    assert [st.tour for st in sparse_greedy(graph, timer)] == [st.tour for st in greedy_tour(edges, timer)]
+    best = dfs(edges, timer)[-1].score
+    assert math.isclose(sparse_dfs(graph, timer)[-1].score, best)
+    stats = sparse_branch_and_bound(graph, timer)
+    assert_valid_tours(edges, stats)
+    assert math.isclose(stats[-1].score, best)
+
+
 @max_score(5)
 def test_greedy():
     graph = [
@@ -52,6 +244,27 @@ def test_greedy():
     assert len(stats) == 1
 
 
+def test_greedy_large():
+    """All 1000 starts should take seconds, not minutes, and starts= caps the work"""
+    _, edges = generate_network(1000, euclidean=True, reduction=0.2, seed=312, matrix=True)
+    timer = Timer(60)
+    stats = greedy_tour(edges, timer)
+    assert timer.time() < 20
+    assert_valid_tour(edges, stats[-1].tour)
+    assert stats[-1].tour[0] not in {st.tour[0] for st in stats[:-1]}
+
+    capped = greedy_tour(edges, Timer(60), starts=8)
+    assert {st.tour[0] for st in capped} <= set(range(0, 1000, 125))
+    assert capped[-1].score >= stats[-1].score
+
+    # A budget too short for all starts still gets the first start's tour, on time
+    _, edges = generate_network(4000, euclidean=True, reduction=0.0, seed=312, matrix=True, reproducible=False)
+    timer = Timer(2)
+    stats = greedy_tour(edges, timer)
+    assert timer.time() < 3
+    assert_valid_tour(edges, stats[-1].tour)
+
+
 @max_score(5)
 def test_dfs():
     graph = [
@@ -73,6 +286,341 @@ def test_dfs():
     assert len(scores) == 1
 
 
+def test_dfs_pruning():
+    """
+    The pruning DFS should finish a 10-city instance and find the optimum,
+    with or without nearest-first ordering.
+    """
+    locations, edges = generate_network(
+        10,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    optimum = held_karp(edges, Timer(60))[-1].score
+
+    for nearest_first in (False, True):
+        timer = Timer(60)
+        stats = dfs(edges, timer, nearest_first=nearest_first)
+        assert not timer.time_out()
+        assert_valid_tours(edges, stats)
+        assert math.isclose(stats[-1].score, optimum)
+        assert stats[-1].n_nodes_pruned > 0
+
+
+def test_two_opt():
+    """
+    2-opt should improve on greedy, and should improve random tours as a post-processor.
+    """
+    locations, edges = generate_network(
+        50,
+        euclidean=True,
+        reduction=0.0,
+        normal=False,
+        seed=312,
+    )
+    greedy_score = greedy_tour(edges, Timer(10))[-1].score
+
+    timer = Timer(10)
+    stats = two_opt(edges, timer)
+    assert not timer.time_out()
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < greedy_score
+
+    random_stats = random_tour(edges, Timer(0.1))
+    stats = improve(edges, Timer(10), random_stats)
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < random_stats[-1].score
+
+
+def test_two_opt_large():
+    """On thousands of cities, 2-opt should start from greedy, not fall back to a random tour, and finish in time"""
+    locations, edges = generate_network(5000, euclidean=True, reduction=0.0, seed=312,
+                                        matrix=True, reproducible=False)
+    greedy_score = greedy_tour(edges, Timer(30), starts=1)[-1].score
+
+    timer = Timer(20)
+    stats = two_opt(edges, timer)
+    assert timer.time() < 21
+    assert_valid_tour(edges, stats[-1].tour)
+    assert stats[0].score <= greedy_score
+    assert stats[-1].score < 0.95 * greedy_score
+
+
+def test_or_opt():
+    """
+    Or-opt/3-opt keep segment directions, so they should improve on greedy
+    even on asymmetric matrices, where 2-opt does not apply.
+    """
+    locations, edges = generate_network(
+        50,
+        euclidean=False,
+        reduction=0.0,
+        normal=False,
+        seed=312,
+    )
+    greedy_score = greedy_tour(edges, Timer(10))[-1].score
+
+    timer = Timer(10)
+    stats = or_opt(edges, timer)
+    assert not timer.time_out()
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < greedy_score
+
+
+def test_lin_kernighan():
+    """
+    LK runs until the time limit, kicking the tour between local searches.
+    It should beat 2-opt, and find the optimum of a small instance.
+    """
+    locations, edges = generate_network(
+        50,
+        euclidean=True,
+        reduction=0.0,
+        normal=False,
+        seed=312,
+    )
+    stats = lin_kernighan(edges, Timer(2), seed=1)
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < two_opt(edges, Timer(10))[-1].score
+
+    locations, edges = generate_network(
+        12,
+        euclidean=True,
+        reduction=0.0,
+        normal=False,
+        seed=312,
+    )
+    stats = lin_kernighan(edges, Timer(1), seed=1)
+    assert_valid_tours(edges, stats)
+    assert math.isclose(stats[-1].score, held_karp(edges, Timer(10))[-1].score)
+
+
+def test_lin_kernighan_large():
+    """On thousands of cities, LK should start from greedy within its construction share, not from a random tour"""
+    locations, edges = generate_network(5000, euclidean=True, reduction=0.0, seed=312,
+                                        matrix=True, reproducible=False)
+    greedy_score = greedy_tour(edges, Timer(30), starts=1)[-1].score
+
+    timer = Timer(10)
+    stats = lin_kernighan(edges, timer, seed=1)
+    assert timer.time() < 11
+    assert_valid_tour(edges, stats[-1].tour)
+    assert stats[0].score <= greedy_score
+    assert stats[-1].score < greedy_score
+
+
+def test_simulated_annealing():
+    """
+    Annealing should beat greedy on a Euclidean instance,
+    and improve on random tours on an asymmetric one (where it cannot use reversals).
+    """
+    locations, edges = generate_network(
+        50,
+        euclidean=True,
+        reduction=0.0,
+        normal=False,
+        seed=312,
+    )
+    stats = simulated_annealing(edges, Timer(2), seed=1)
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < greedy_tour(edges, Timer(10))[-1].score
+
+    locations, edges = generate_network(
+        50,
+        euclidean=False,
+        reduction=0.0,
+        normal=False,
+        seed=312,
+    )
+    stats = simulated_annealing(edges, Timer(2), seed=1)
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < random_tour(edges, Timer(2))[-1].score
+
+
+def test_order_crossover():
+    """Every child of a batched order crossover should be a permutation"""
+    rng = np.random.default_rng(312)
+    first = rng.random((200, 20)).argsort(axis=1)
+    second = rng.random((200, 20)).argsort(axis=1)
+    children = order_crossover(first, second, rng)
+    assert (np.sort(children, axis=1) == np.arange(20)).all()
+
+
+def test_genetic():
+    """The genetic solver starts from greedy, and should improve on it"""
+    locations, edges = generate_network(
+        50,
+        euclidean=True,
+        reduction=0.0,
+        normal=False,
+        seed=312,
+    )
+    stats = genetic(edges, Timer(3), seed=1)
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < greedy_tour(edges, Timer(10))[-1].score
+
+
+def test_genetic_tiny_population():
+    """A population smaller than the elite just keeps its best tours"""
+    locations, edges = generate_network(10, euclidean=True, reduction=0.2, seed=312)
+    for population_size in (1, 2):
+        stats = genetic(edges, Timer(0.5), population_size=population_size, elite=2, seed=1)
+        assert_valid_tours(edges, stats)
+
+    with pytest.raises(ValueError):
+        genetic(edges, Timer(0.5), population_size=0)
+
+
+def test_ant_colony():
+    """Ants should avoid missing edges, and beat greedy"""
+    locations, edges = generate_network(
+        30,
+        euclidean=True,
+        reduction=0.5,
+        normal=False,
+        seed=312,
+    )
+    stats = ant_colony(edges, Timer(3), seed=1)
+    assert_valid_tours(edges, stats)
+    assert stats[-1].score < greedy_tour(edges, Timer(10))[-1].score
+
+
+def test_branch_and_bound_parallel():
+    """
+    Parallel B&B should find the optimum, and its last entry should carry
+    the counters of all workers.
+    """
+    locations, edges = generate_network(
+        15,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    timer = Timer(60)
+    stats = branch_and_bound_parallel(edges, timer, processes=2)
+    assert not timer.time_out()
+    assert_valid_tours(edges, stats)
+    assert math.isclose(stats[-1].score, held_karp(edges, Timer(10))[-1].score)
+    assert stats[-1].n_nodes_expanded >= max(stat.n_nodes_expanded for stat in stats)
+
+
+def test_local_search_best_tour():
+    """The local searches start from the timer's best tour (e.g. a portfolio's incumbent) when it beats their own"""
+    locations, edges = generate_network(200, euclidean=True, reduction=0, normal=False, seed=312)
+    best = lin_kernighan(edges, Timer(3), seed=1)[-1]
+    assert two_opt(edges, Timer(1))[-1].score > best.score
+
+    class IncumbentTimer(Timer):
+        def upper_bound(self):
+            return best.score
+
+        def best_tour(self):
+            return best.tour
+
+    for solver in (two_opt, or_opt, lin_kernighan):
+        stats = solver(edges, IncumbentTimer(1))
+        assert_valid_tours(edges, stats)
+        assert stats[-1].score <= best.score
+
+
+def test_portfolio():
+    """
+    Solvers raced in a portfolio share one time limit,
+    and the best tour is the best of all their timelines.
+    """
+    locations, edges = generate_network(
+        30,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    timer = Timer(3)
+    result = portfolio(edges, timer, lin_kernighan, branch_and_bound_smart)
+    assert timer.time() < 3 + 3
+    assert set(result.timelines) == {'lin_kernighan', 'branch_and_bound_smart'}
+    for stats in result.timelines.values():
+        assert_valid_tours(edges, stats)
+    assert result.best.score == min(stats[-1].score for stats in result.timelines.values())
+
+
+def test_streaming():
+    """
+    A streamed solver yields strictly improving solutions,
+    and closing the stream stops the solver long before its time limit.
+    """
+    locations, edges = generate_network(
+        20,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    stats = collect(streaming(branch_and_bound_smart))(edges, Timer(10))
+    assert_valid_tours(edges, stats)
+    assert all(later.score < earlier.score for earlier, later in zip(stats, stats[1:]))
+
+    timer = Timer(60)
+    solutions = streaming(dfs)(edges, timer)
+    next(solutions)
+    solutions.close()
+    assert timer.time() < 5
+
+    # Warm starts run on a child of the solver's timer, so they stop when it does
+    assert Timer(-1).child(20).time_out()
+
+    # Multiprocessing solvers can be streamed from the stream's thread too
+    locations, edges = generate_network(12, euclidean=True, reduction=0.2, seed=312)
+    stats = collect(streaming(branch_and_bound_parallel))(edges, Timer(30))
+    assert_valid_tours(edges, stats)
+    assert math.isclose(stats[-1].score, held_karp(edges, Timer(10))[-1].score)
+
+    # The warm start is streamed as soon as it is found, and closing the stream stops the workers
+    locations, edges = generate_network(40, euclidean=True, reduction=0.2, seed=312)
+    for solver in (branch_and_bound, branch_and_bound_parallel):
+        timer = Timer(60)
+        solutions = streaming(solver)(edges, timer)
+        assert next(solutions).time < 5
+        solutions.close()
+        assert timer.time() < 10
+
+
+def test_instruments():
+    """
+    Instruments should not change the search, should see every prune,
+    should time every search, and should survive a round trip through JSON.
+    B&B solutions should report their real max queue size.
+    """
+    locations, edges = generate_network(
+        12,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    plain = branch_and_bound(edges, Timer(10))
+    instruments = Instruments()
+    stats = branch_and_bound(edges, Timer(10), instruments=instruments)
+    assert [st.score for st in stats] == [st.score for st in plain]
+    assert stats[-1].max_queue_size > 1
+    assert sum(instruments.prunes.values()) >= stats[-1].n_nodes_pruned
+    assert instruments.samples
+    assert instruments.times['expansion'] > 0 and instruments.times['bound'] > 0
+
+    for solver in (dfs, branch_and_bound_inplace, branch_and_bound_edges):
+        other = Instruments()
+        stats = solver(edges, Timer(10), instruments=other)
+        assert stats[-1].score == plain[-1].score
+        assert sum(other.prunes.values()) >= stats[-1].n_nodes_pruned
+        assert sum(other.times.values()) > 0
+
+    loaded = Instruments.from_dict(json.loads(instruments.to_json()))
+    assert loaded.to_dict() == instruments.to_dict()
+
+
 @max_score(10)
 def test_branch_and_bound():
     """
@@ -105,6 +653,106 @@ def test_branch_and_bound():
     assert bnb_score < greedy_score
 
 
+def test_branch_and_bound_inplace():
+    """
+    The undo-log B&B should reach the same optimum as the copying B&B.
+    """
+    locations, edges = generate_network(
+        15,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+
+    timer = Timer(120)
+    bnb_stats = branch_and_bound(edges, timer)
+    bnb_score = score_tour(bnb_stats[-1].tour, edges)
+
+    timer = Timer(120)
+    stats = branch_and_bound_inplace(edges, timer)
+    assert not timer.time_out()
+    assert_valid_tours(edges, stats)
+    assert score_tour(stats[-1].tour, edges) == bnb_score
+
+
+def test_held_karp():
+    graph = [
+        [0, 9, inf, 8, inf],
+        [inf, 0, 4, inf, 2],
+        [inf, 3, 0, 4, inf],
+        [inf, 6, 7, 0, 12],
+        [1, inf, inf, 10, 0]
+    ]
+    stats = held_karp(graph, Timer(10))
+    assert_valid_tours(graph, stats)
+    assert stats[-1].tour == [0, 3, 2, 1, 4]
+    assert stats[-1].score == 21
+
+    locations, edges = generate_network(
+        15,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    timer = Timer(60)
+    stats = held_karp(edges, timer)
+    assert not timer.time_out()
+    assert_valid_tours(edges, stats)
+    assert math.isclose(stats[-1].score, 3.664)
+
+    with pytest.raises(ValueError):
+        held_karp([[0] * 40] * 40, Timer(10))
+    assert held_karp_memory(40) > held_karp_memory(20)
+
+    # The estimate covers the temporaries as well as the tables
+    locations, edges = generate_network(17, euclidean=True, reduction=0.2, seed=312)
+    tracemalloc.start()
+    held_karp(edges, Timer(60))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak <= held_karp_memory(17)
+
+
+def test_one_tree_bound():
+    """
+    B&B with the 1-tree bound should still find the optimum.
+    """
+    locations, edges = generate_network(
+        15,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    optimum = held_karp(edges, Timer(60))[-1].score
+
+    for solver in (branch_and_bound, branch_and_bound_smart):
+        timer = Timer(60)
+        stats = solver(edges, timer, bound=OneTreeBound())
+        assert not timer.time_out()
+        assert_valid_tours(edges, stats)
+        assert math.isclose(stats[-1].score, optimum)
+
+
+def test_branch_and_bound_edges():
+    locations, edges = generate_network(
+        15,
+        euclidean=True,
+        reduction=0.2,
+        normal=False,
+        seed=312,
+    )
+    optimum = held_karp(edges, Timer(60))[-1].score
+
+    timer = Timer(60)
+    stats = branch_and_bound_edges(edges, timer)
+    assert not timer.time_out()
+    assert_valid_tours(edges, stats)
+    assert math.isclose(stats[-1].score, optimum)
+
+
 @max_score(10)
 def test_branch_and_bound_smart():
     """
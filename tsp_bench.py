@@ -0,0 +1,226 @@
+import time
+import tracemalloc
+
+import numpy as np
+from math import inf
+
+from tsp_core import generate_network
+
+
+def time_call(func, *args, repeats=20) -> float:
+    """Average seconds per call of func(*args)"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+def bench_reduction(sizes=(15, 30, 50), repeats=20, seed=312):
+    from branch_and_bound import reduction, reduction_array
+
+    print(f'{"n":>4} {"lists (ms)":>12} {"numpy (ms)":>12} {"speedup":>8}')
+    for n in sizes:
+        _, edges = generate_network(n, euclidean=True, reduction=0.2, seed=seed)
+        for i in range(n):
+            edges[i][i] = inf
+        graph = np.array(edges, dtype=float)
+
+        t_list = time_call(reduction, edges, repeats=repeats)
+        t_array = time_call(reduction_array, graph, repeats=repeats)
+        print(f'{n:>4} {t_list * 1000:>12.3f} {t_array * 1000:>12.3f} {t_list / t_array:>7.1f}x')
+
+
+def bench_branch(sizes=(15, 30, 50), repeats=2000, seed=312):
+    """Bounding one child: copy + full reduction vs. ReducedMatrix.branch + undo"""
+    from branch_and_bound import reduction_array, ReducedMatrix
+
+    def copy_and_reduce(graph, nxt):
+        graph = graph.copy()
+        graph[0, :] = inf
+        graph[:, nxt] = inf
+        graph[nxt, 0] = inf
+        return reduction_array(graph, inplace=True)
+
+    def branch_and_undo(matrix, nxt):
+        mark = matrix.mark()
+        matrix.branch(0, nxt)
+        matrix.undo(mark)
+
+    print(f'{"n":>4} {"copy (us)":>12} {"branch (us)":>12} {"speedup":>8}')
+    for n in sizes:
+        _, edges = generate_network(n, euclidean=True, reduction=0.2, seed=seed)
+        matrix = ReducedMatrix(edges)
+
+        t_copy = time_call(lambda: [copy_and_reduce(matrix.graph, c) for c in range(1, n)], repeats=repeats // n)
+        t_branch = time_call(lambda: [branch_and_undo(matrix, c) for c in range(1, n)], repeats=repeats // n)
+        t_copy /= n - 1
+        t_branch /= n - 1
+        print(f'{n:>4} {t_copy * 1e6:>12.1f} {t_branch * 1e6:>12.1f} {t_copy / t_branch:>7.1f}x')
+
+
+def bench_expand(sizes=(15, 30, 50), repeats=200, seed=312):
+    """Bounding all children of the root: one child at a time vs. expand_children"""
+    from branch_and_bound import reduction_array, expand_children, ReducedMatrix
+
+    def one_at_a_time(graph, cities):
+        for nxt in cities:
+            child = graph.copy()
+            child[0, :] = inf
+            child[:, nxt] = inf
+            child[nxt, 0] = inf
+            reduction_array(child, inplace=True)
+
+    print(f'{"n":>4} {"loop (us)":>12} {"batched (us)":>12} {"speedup":>8}')
+    for n in sizes:
+        _, edges = generate_network(n, euclidean=True, reduction=0.2, seed=seed)
+        graph = ReducedMatrix(edges).graph
+        cities = list(range(1, n))
+
+        t_loop = time_call(one_at_a_time, graph, cities, repeats=repeats)
+        t_batch = time_call(expand_children, graph, 0, cities, repeats=repeats)
+        print(f'{n:>4} {t_loop * 1e6:>12.1f} {t_batch * 1e6:>12.1f} {t_loop / t_batch:>7.1f}x')
+
+
+def node_memory(build, count=10000) -> float:
+    """Bytes per node allocated by build(count), as measured by tracemalloc"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    return (after - before) / count
+
+
+def bench_node_memory(n=50, seed=312):
+    """
+    Per-node bookkeeping of a frontier full of siblings at depth n/2,
+    not counting the reduced matrices (which are the same size either way).
+    A SearchNode's path is an entry in its search's PathArena, which is counted too.
+    """
+    from tsp_search import SearchNode
+
+    _, edges = generate_network(n, euclidean=True, reduction=0.0, seed=seed)
+    depth = n // 2
+    prefix = list(range(depth))
+
+    def as_tuples(count):
+        return [(prefix + [depth + i % (n - depth)], None, float(i)) for i in range(count)]
+
+    def as_nodes(count):
+        parent = SearchNode.root(0, 0.0)
+        for city in prefix[1:]:
+            parent = parent.child(city, edges[city - 1][city], 0.0)
+        return [parent.child(depth + i % (n - depth), 1.0, float(i)) for i in range(count)]
+
+    print(f'depth {depth}: tuple+list {node_memory(as_tuples):.0f} B/node, '
+          f'SearchNode {node_memory(as_nodes):.0f} B/node')
+
+
+def bench_branching(sizes=(15, 18), timeout=60, seed=312):
+    """City-order branching vs. Little's edge branching: nodes expanded and time to the optimum"""
+    from tsp_core import Timer
+    from tsp_solve import branch_and_bound, branch_and_bound_smart, branch_and_bound_edges
+
+    print(f'{"n":>4} {"solver":>24} {"score":>8} {"nodes":>8} {"to best (s)":>12} {"total (s)":>10}')
+    for n in sizes:
+        _, edges = generate_network(n, euclidean=True, reduction=0.2, seed=seed)
+        for solver in (branch_and_bound, branch_and_bound_smart, branch_and_bound_edges):
+            timer = Timer(timeout)
+            stats = solver(edges, timer)
+            total = timer.time()
+            best = stats[-1]
+            print(f'{n:>4} {solver.__name__:>24} {best.score:>8.3f} {best.n_nodes_expanded:>8} '
+                  f'{best.time:>12.3f} {total:>10.3f}')
+
+
+def bench_generate(sizes=(500, 2000, 5000), seed=312):
+    """generate_network: the seed-compatible stream as lists and as a DistanceMatrix, and the numpy Generator"""
+    def generate(n, **kwargs):
+        start = time.perf_counter()
+        generate_network(n, euclidean=True, reduction=0.2, seed=seed, **kwargs)
+        return time.perf_counter() - start
+
+    print(f'{"n":>5} {"lists (s)":>10} {"matrix (s)":>11} {"generator (s)":>14}')
+    for n in sizes:
+        print(f'{n:>5} {generate(n):>10.3f} {generate(n, matrix=True):>11.3f} '
+              f'{generate(n, matrix=True, reproducible=False):>14.3f}')
+
+
+def bench_greedy(sizes=(1000, 2000, 3000), starts=64, seed=312):
+    """greedy_tour from every start city and from a capped number of them (as the B&B warm starts do)"""
+    from tsp_core import Timer
+    from tsp_solve import greedy_tour
+
+    def run(edges, **kwargs):
+        start = time.perf_counter()
+        score = greedy_tour(edges, Timer(600), **kwargs)[-1].score
+        return time.perf_counter() - start, score
+
+    print(f'{"n":>5} {"all (s)":>9} {"score":>9} {f"{starts} starts (s)":>14} {"score":>9}')
+    for n in sizes:
+        _, edges = generate_network(n, euclidean=True, reduction=0.2, seed=seed, matrix=True)
+        t_all, s_all = run(edges)
+        t_capped, s_capped = run(edges, starts=starts)
+        print(f'{n:>5} {t_all:>9.2f} {s_all:>9.3f} {t_capped:>14.2f} {s_capped:>9.3f}')
+
+
+def bench_instruments(sizes=(14, 16), repeats=21, seed=312):
+    """
+    The cost of instrumenting a search: the median, over repeats rounds, of how much longer
+    an instrumented run took than a plain one. Each round also times a second plain run,
+    and 'noise' is the same median for it, which is how small an overhead this machine can resolve.
+    The runs of a round are taken back to back (in rotating order), timed in CPU time
+    and with the garbage collector off, so they all see the same machine load.
+    """
+    import contextlib
+    import gc
+    import io
+    import statistics
+    from tsp_core import Timer
+    from tsp_instrument import Instruments
+    from tsp_solve import (dfs, branch_and_bound, branch_and_bound_smart,
+                           branch_and_bound_inplace, branch_and_bound_edges)
+
+    def run(solver, edges, instrumented):
+        kwargs = {'instruments': Instruments()} if instrumented else {}
+        # Each run starts from a clean heap, and no run pays for collecting another's garbage
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.process_time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                solver(edges, Timer(600), **kwargs)
+            return time.process_time() - start
+        finally:
+            gc.enable()
+
+    def compare(n, solver):
+        _, edges = generate_network(n, euclidean=True, reduction=0.2, seed=seed)
+        plain, overheads, noises = [], [], []
+        for i in range(repeats):
+            order = ('plain', 'instrumented', 'again')[i % 3:] + ('plain', 'instrumented', 'again')[:i % 3]
+            times = {name: run(solver, edges, name == 'instrumented') for name in order}
+            plain.append(times['plain'])
+            overheads.append(times['instrumented'] / times['plain'] - 1)
+            noises.append(times['again'] / times['plain'] - 1)
+        print(f'{n:>4} {solver.__name__:>24} {statistics.median(plain):>10.3f} '
+              f'{statistics.median(overheads):>8.1%} {statistics.median(noises):>8.1%}')
+
+    print(f'{"n":>4} {"solver":>24} {"plain (s)":>10} {"overhead":>9} {"noise":>8}')
+    for n in sizes:
+        for solver in (branch_and_bound, branch_and_bound_smart, branch_and_bound_inplace, branch_and_bound_edges):
+            compare(n, solver)
+    # dfs's nodes are much cheaper, so it is run on a smaller network
+    compare(10, dfs)
+
+
+if __name__ == '__main__':
+    bench_reduction()
+    bench_branch()
+    bench_expand()
+    bench_node_memory()
+    bench_branching()
+    bench_generate()
+    bench_greedy()
+    bench_instruments()
@@ -0,0 +1,192 @@
+import math
+from typing import Any, Callable, Protocol
+
+import numpy as np
+from math import inf
+
+from branch_and_bound import reduction_array, reduction_batch, child_matrices
+from tsp_search import SearchNode
+
+
+class BoundProvider(Protocol):
+    """
+    How a B&B solver computes lower bounds.
+
+    root() sets the provider up for a matrix of edge weights and returns
+    the state and lower bound of the root node (the path [0]).
+    children() bounds node -> city for every city in cities.
+    It returns one state per child (None for children whose bound reached upper_bound,
+    which the solver will prune) and the children's lower bounds.
+    The state is stored on the SearchNode as node.graph.
+    When lap is given (the node is being timed by Instruments), children() may call it with a phase name
+    as each phase of its work ends; whatever it does not lap is counted as 'bound'.
+    """
+
+    def root(self, edges: list[list[float]]) -> tuple[Any, float]: ...
+
+    def children(self, node: SearchNode, cities: list[int], upper_bound: float,
+                 lap: Callable[[str], None] = None) -> tuple[list[Any], list[float]]: ...
+
+
+class ReductionBound:
+    """
+    The row/column reduction bound; the state is the node's reduced matrix.
+    children() laps after expand() and reduce(), so Instruments can time the two apart.
+    """
+
+    def root(self, edges):
+        graph = np.array(edges, dtype=float)
+        np.fill_diagonal(graph, inf)
+        return reduction_array(graph, inplace=True)
+
+    def expand(self, node, cities):
+        """The children's matrices (as one batch, before reduction) and the reduced cost of each move"""
+        return child_matrices(node.graph, node.city, cities)
+
+    def reduce(self, children):
+        """Reduce a batch of matrices in place; returns them and what each reduction adds to the bound"""
+        return reduction_batch(children)
+
+    def children(self, node, cities, upper_bound, lap=None):
+        # All children are built and bounded in one batched call. Each survivor is copied out of the batch,
+        # so the batch (and the pruned children in it) is freed now, and each survivor is freed with its node
+        children, move_costs = self.expand(node, cities)
+        if lap:
+            lap('expansion')
+        children, extra = self.reduce(children)
+        bounds = node.bound + move_costs + extra
+        if lap:
+            lap('bound')
+
+        states = [None] * len(cities)
+        for i in np.flatnonzero(bounds < upper_bound).tolist():
+            states[i] = children[i].copy()
+        if lap:
+            lap('expansion')
+        return states, bounds.tolist()
+
+
+def _one_tree(weights: np.ndarray, hub: np.ndarray) -> tuple[float, np.ndarray]:
+    """
+    Minimum 1-tree: a minimum spanning tree over weights (Prim's algorithm)
+    plus the two cheapest edges from an extra hub node, whose edge weights are in hub.
+    Returns the cost and the degree of every (non-hub) node, or inf if the graph is disconnected.
+    """
+    k = len(weights)
+    degrees = np.zeros(k, dtype=int)
+    in_tree = np.zeros(k, dtype=bool)
+    in_tree[0] = True
+    dist = weights[0].copy()
+    dist[0] = inf
+    parent = np.zeros(k, dtype=int)
+    total = 0.0
+
+    for _ in range(k - 1):
+        j = int(dist.argmin())
+        if dist[j] == inf:
+            return inf, degrees
+        total += dist[j]
+        degrees[j] += 1
+        degrees[parent[j]] += 1
+        in_tree[j] = True
+        dist[j] = inf
+
+        closer = (weights[j] < dist) & ~in_tree
+        dist[closer] = weights[j][closer]
+        parent[closer] = j
+
+    two = np.argpartition(hub, 1)[:2]
+    if hub[two[1]] == inf:
+        return inf, degrees
+    total += hub[two].sum()
+    degrees[two] += 1
+    return total, degrees
+
+
+class OneTreeBound:
+    """
+    Held-Karp Lagrangian 1-tree bound.
+
+    For a node with path 0 ... last, the rest of the tour is a path from last
+    through the unvisited cities back to 0. Contracting the fixed path to a hub node
+    turns that into a cycle, and a minimum 1-tree on it (with the hub as the special node)
+    is a lower bound. Node penalties pi are improved by subgradient ascent,
+    and each child starts from its parent's penalties.
+
+    Edge weights are symmetrized with min(w[i][j], w[j][i]), so the bound stays valid
+    on asymmetric matrices, but it is only tight on symmetric ones.
+    """
+
+    def __init__(self, root_iterations: int = 50, child_iterations: int = 5, step: float = 1.0):
+        self.root_iterations = root_iterations
+        self.child_iterations = child_iterations
+        self.step = step
+
+    def root(self, edges):
+        self.graph = np.array(edges, dtype=float)
+        np.fill_diagonal(self.graph, inf)
+        self.sym = np.minimum(self.graph, self.graph.T)
+        self.n = len(edges)
+
+        penalties = np.zeros(self.n)
+        if self.n < 3:
+            return penalties, 0
+        bound = self._ascent(0, 0, list(range(1, self.n)), penalties, inf, self.root_iterations)
+        return penalties, bound
+
+    def children(self, node, cities, upper_bound, lap=None):
+        visited = node.visited
+        states = []
+        bounds = []
+        for city in cities:
+            cost = node.cost + self.graph[node.city, city]
+            rest = [c for c in range(self.n) if not (visited >> c) & 1 and c != city]
+            penalties = node.graph.copy()
+
+            bound = self._ascent(city, cost, rest, penalties, upper_bound, self.child_iterations)
+            bounds.append(bound)
+            states.append(penalties if bound < upper_bound else None)
+        return states, bounds
+
+    def _ascent(self, last, cost, rest, penalties, upper_bound, iterations) -> float:
+        """
+        Bound the tours that continue from last through every city in rest and back to 0,
+        given cost for the path so far. Updates penalties (for the cities in rest) in place.
+        """
+        if not rest:
+            return cost + self.graph[last, 0]
+        if len(rest) == 1:
+            only = rest[0]
+            return cost + self.graph[last, only] + self.graph[only, 0]
+
+        rest = np.array(rest)
+        weights = self.sym[np.ix_(rest, rest)]
+        hub = np.minimum(self.graph[last, rest], self.graph[rest, 0])
+
+        best = -inf
+        best_pi = penalties[rest]
+        pi = best_pi.copy()
+        step = self.step
+        for _ in range(iterations):
+            tree, degrees = _one_tree(weights + pi[:, None] + pi[None, :], hub + pi)
+            if math.isinf(tree):
+                return inf
+
+            value = tree - 2 * pi.sum()
+            if value > best:
+                best = value
+                best_pi = pi.copy()
+
+            gradient = degrees - 2
+            norm = gradient @ gradient
+            if norm == 0 or cost + best >= upper_bound:
+                # A 1-tree that is a tour is optimal, and a pruned child needs no more work
+                break
+
+            # Polyak step towards the best known tour (or a bit above the current value)
+            target = upper_bound - cost if upper_bound < inf else value + abs(value) * 0.1 + 1e-9
+            pi = pi + step * (target - value) / norm * gradient
+            step *= 0.9
+
+        penalties[rest] = best_pi
+        return cost + best
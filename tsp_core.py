@@ -2,8 +2,11 @@ import dataclasses
 import random
 import math
 import time
+from multiprocessing import shared_memory
 
-from typing import NamedTuple, Protocol
+from typing import Iterator, NamedTuple, Protocol
+
+import numpy as np
 
 
 class Timer:
@@ -17,6 +20,50 @@ class Timer:
     def time_out(self) -> bool:
         return self.time() > self.time_limit
 
+    def record(self, stats: 'SolutionStats'):
+        """
+        Called by solvers with each new best solution.
+        Does nothing here; timers that stream or share solutions override it.
+        """
+
+    def upper_bound(self) -> float:
+        """The cost of the best tour known outside the solver (inf here)"""
+        return math.inf
+
+    def best_tour(self) -> 'Tour':
+        """The tour upper_bound() is the cost of, for a solver that can start from it ([] here)"""
+        return []
+
+    def child(self, time_limit: float) -> 'Timer':
+        """A Timer for a step inside a solver (e.g. a warm start) that also times out when this one does"""
+        return ChildTimer(self, time_limit)
+
+
+class ChildTimer(Timer):
+    """
+    A Timer for a step inside a solver, on its parent's clock: time() is the parent's,
+    and it times out time_limit seconds after it was made, or when the parent does
+    (e.g. when a StreamTimer is stopped). Solutions are recorded on the parent,
+    and the parent's upper bound and best tour are used.
+    """
+
+    def __init__(self, parent: Timer, time_limit: float):
+        super().__init__(parent.time() + time_limit)
+        self.start = parent.start
+        self.parent = parent
+
+    def time_out(self) -> bool:
+        return super().time_out() or self.parent.time_out()
+
+    def record(self, stats: 'SolutionStats'):
+        self.parent.record(stats)
+
+    def upper_bound(self) -> float:
+        return self.parent.upper_bound()
+
+    def best_tour(self) -> 'Tour':
+        return self.parent.best_tour()
+
 
 # List of cities in the tour
 # Assumes the last city returns to the first
@@ -46,6 +93,145 @@ class Solver(Protocol):
                  ) -> list[SolutionStats]: ...
 
 
+class StreamingSolver(Protocol):
+    """
+    A Solver that yields each improved solution as soon as it has it.
+    The caller can stop it early by closing the generator (e.g. breaking out of a for loop).
+    """
+
+    def __call__(self,
+                 edges: list[list[float]],
+                 timer: Timer
+                 ) -> Iterator[SolutionStats]: ...
+
+
+class DistanceMatrix:
+    """
+    An immutable n x n matrix of edge weights in one contiguous float64 (or float32) array.
+    Missing edges are inf.
+
+    It reads like the list of lists the solvers take: len(matrix), matrix[i][j]
+    (or matrix[i, j]), and iterating gives the rows. Rows are read-only views, and
+    np.asarray(matrix) gives the array itself, so nothing is copied;
+    copy.copy and copy.deepcopy return the matrix itself too.
+    Solvers that index it heavily from Python can take as_lists(edges) instead.
+
+    DistanceMatrix.shared(edges) puts the array in multiprocessing.shared_memory.
+    It is then pickled as the block's name, and unpickling it in another process
+    attaches to the same memory instead of copying the n^2 weights.
+    The process that made the block frees it with close() (or a with block).
+    """
+
+    def __init__(self, edges, dtype=np.float64):
+        array = np.array(edges, dtype=dtype)
+        if array.ndim != 2 or array.shape[0] != array.shape[1]:
+            raise ValueError(f'Expected a square matrix, got shape {array.shape}')
+        if np.isnan(array).any():
+            raise ValueError('Edge weights cannot be NaN (use inf for missing edges)')
+        array.flags.writeable = False
+        self._array = array
+        self._shm = None
+        self._owner = False
+
+    @staticmethod
+    def shared(edges, dtype=np.float64) -> 'DistanceMatrix':
+        """A DistanceMatrix in a new shared memory block, which this process owns"""
+        array = DistanceMatrix(edges, dtype).array
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        buffer = np.frombuffer(shm.buf, array.dtype, count=array.size)
+        buffer[:] = array.ravel()
+        del buffer
+        matrix = DistanceMatrix._attach(shm, len(array), array.dtype.str)
+        matrix._owner = True
+        return matrix
+
+    @staticmethod
+    def _attach(shm, n: int, dtype: str) -> 'DistanceMatrix':
+        if isinstance(shm, str):
+            shm = shared_memory.SharedMemory(name=shm)
+        matrix = DistanceMatrix.__new__(DistanceMatrix)
+        # frombuffer keeps the block exported while the array (or any view of it) is alive,
+        # so the block can't be unmapped from under it
+        matrix._array = np.frombuffer(shm.buf, np.dtype(dtype), count=n * n).reshape(n, n)
+        matrix._array.flags.writeable = False
+        matrix._shm = shm
+        matrix._owner = False
+        return matrix
+
+    @property
+    def array(self) -> np.ndarray:
+        """The weights, as a read-only array"""
+        return self._array
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    def to_lists(self) -> list[list[float]]:
+        return self._array.tolist()
+
+    def close(self):
+        """
+        Detach from the shared memory block, and free it if this process made it.
+        The matrix keeps working from a private copy. Like SharedMemory.close,
+        this raises BufferError while views of the shared array are still alive.
+        """
+        if self._shm is None:
+            return
+        if self._owner:
+            self._shm.unlink()
+            self._owner = False
+        if self._array.base is not None:
+            self._array = self._array.copy()
+            self._array.flags.writeable = False
+        self._shm.close()
+        self._shm = None
+
+    def __enter__(self) -> 'DistanceMatrix':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        if self._shm is not None:
+            return DistanceMatrix._attach, (self._shm.name, len(self), self.dtype.str)
+        return DistanceMatrix, (self._array, self.dtype)
+
+    def __copy__(self) -> 'DistanceMatrix':
+        return self
+
+    def __deepcopy__(self, memo) -> 'DistanceMatrix':
+        return self
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if copy:
+            return np.array(self._array, dtype=dtype)
+        if dtype is None or np.dtype(dtype) == self.dtype:
+            return self._array
+        if copy is False:
+            raise ValueError(f'Cannot view a {self.dtype} DistanceMatrix as {np.dtype(dtype)} without copying')
+        return self._array.astype(dtype)
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, index):
+        return self._array[index]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self._array)
+
+    def __repr__(self) -> str:
+        where = f', shared as {self._shm.name!r}' if self._shm is not None else ''
+        return f'DistanceMatrix(n={len(self)}, dtype={self.dtype}{where})'
+
+
+def as_lists(edges) -> list[list[float]]:
+    """edges as a list of lists (a DistanceMatrix is converted, anything else is returned as it is)"""
+    return edges.to_lists() if isinstance(edges, DistanceMatrix) else edges
+
+
 class Location(NamedTuple):
     x: float
     y: float
@@ -57,45 +243,115 @@ def _euclidean_dist(loc1: Location, loc2: Location) -> float:
     return math.sqrt((a1 - a2) ** 2 + (b1 - b2) ** 2)
 
 
+def _mersenne_twister(rng: random.Random) -> np.random.RandomState:
+    """A numpy RandomState that continues rng's stream: its random_sample gives what rng.random() would"""
+    _, state, _ = rng.getstate()
+    numpy_rng = np.random.RandomState()
+    numpy_rng.set_state(('MT19937', np.array(state[:-1], dtype=np.uint32), state[-1]))
+    return numpy_rng
+
+
+def _round(weights: np.ndarray, digits: int = 3) -> np.ndarray:
+    """np.round, but agreeing with Python's round() where the two can differ (values within an ulp of a tie)"""
+    scaled = weights * 10 ** digits
+    rounded = np.round(weights, digits)
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9
+    for index in zip(*np.nonzero(near_tie)):
+        rounded[index] = round(float(weights[index]), digits)
+    return rounded
+
+
+# Rows of the distance matrix computed at once, sized so the temporaries of a block stay around 8 MB
+_DISTANCE_BLOCK = 1 << 20
+
+
+def _distances(xy: np.ndarray) -> np.ndarray:
+    """
+    All pairwise distances between the points, computed as _euclidean_dist does,
+    a block of rows at a time so no temporary is as large as the result
+    """
+    x, y = xy[:, 0], xy[:, 1]
+    n = len(xy)
+    distances = np.empty((n, n))
+    step = max(1, _DISTANCE_BLOCK // max(n, 1))
+    for start in range(0, n, step):
+        rows = slice(start, start + step)
+        dx = x[rows, None] - x
+        dy = y[rows, None] - y
+        np.sqrt(dx * dx + dy * dy, out=distances[rows])
+    return distances
+
+
+def _legacy_network(n, seed, reduction, euclidean, normal) -> tuple[np.ndarray, np.ndarray]:
+    """The locations and weights the original random-module implementation drew for seed"""
+    rng = random.Random(seed)
+
+    if euclidean:
+        # One draw per location coordinate, then one per cell to decide whether it is removed,
+        # so the whole stream can be drawn at once
+        draws = _mersenne_twister(rng).random_sample(2 * n + n * n)
+        xy = draws[:2 * n].reshape(n, 2)
+        removed = draws[2 * n:].reshape(n, n) < reduction
+        return xy, np.where(removed, math.inf, _round(_distances(xy)))
+
+    # Random weights are only drawn for the cells that are kept (and gauss caches every other value),
+    # so the cells have to be drawn one at a time
+    xy = np.array([(rng.random(), rng.random()) for _ in range(n)]).reshape(n, 2)
+    random_weight = (lambda: rng.gauss(mu=0.0, sigma=1.0)) if normal else rng.random
+    weights = [
+        [
+            math.inf
+            if (rng.random() < reduction)
+            else round(random_weight(), 3)
+            for t in range(n)
+        ]
+        for s in range(n)
+    ]
+    return xy, np.array(weights, dtype=float).reshape(n, n)
+
+
 def generate_network(
         n: int,
         seed: int | None = None,
         reduction: float = 0.0,
         euclidean: bool = True,
         normal: bool = False,
-) -> tuple[list[Location], list[list[float]]]:
+        reproducible: bool = True,
+        matrix: bool = False,
+) -> tuple[list[Location], list[list[float]] | DistanceMatrix]:
     """
     Generate a random network of cities.
+    The network is drawn from its own random generator; the global random module is left alone.
 
     :param n: How many cities
-    :param seed: Seed for random.seed(). Use None for default (system time).
+    :param seed: Seed for the network's random generator. Use None for default (system entropy).
     :param reduction: Fraction of edges to remove
     :param euclidean: Whether to use Euclidean weights
-    :param normal: Whether to use normally-distributed weights (requires euclidean=True)
+    :param normal: Whether to use normally-distributed weights (requires euclidean=False)
+    :param reproducible: Give the same network for a seed as the original random-module version did.
+        Only Euclidean networks are vectorised then: non-Euclidean weights are still drawn
+        one cell at a time, as that stream only draws them for the cells that are kept.
+        Otherwise the network is drawn from a numpy Generator, which is much faster for non-Euclidean weights.
+    :param matrix: Return the weights as a DistanceMatrix instead of a list of lists
     :return: The locations of the cities and an n x n matrix of edge weights
     """
 
-    random.seed(seed)
-
-    locations = [
-        Location(random.random(), random.random())
-        for _ in range(n)
-    ]
-
-    random_weight = (lambda: random.gauss(mu=0.0, sigma=1.0)) if normal else random.random
-    _dist = _euclidean_dist if euclidean else lambda a, b: random_weight()
-
-    edges = [
-        [
-            math.inf
-            if (random.random() < reduction)
-            else round(_dist(locations[s], locations[t]), 3)
-            for t in range(n)
-        ]
-        for s in range(n)
-    ]
+    if reproducible:
+        xy, weights = _legacy_network(n, seed, reduction, euclidean, normal)
+    else:
+        rng = np.random.default_rng(seed)
+        xy = rng.random((n, 2))
+        removed = rng.random((n, n)) < reduction
+        if euclidean:
+            weights = _distances(xy)
+        elif normal:
+            weights = rng.standard_normal((n, n))
+        else:
+            weights = rng.random((n, n))
+        weights = np.where(removed, math.inf, _round(weights))
 
-    return locations, edges
+    locations = [Location(x, y) for x, y in xy.tolist()]
+    return locations, DistanceMatrix(weights) if matrix else weights.tolist()
 
 
 def get_segments(tour: Tour) -> list[tuple[int, int]]:
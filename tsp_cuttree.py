@@ -1,65 +1,130 @@
 import dataclasses
 import math
 
+# A subtree counts as fully cut once this little of it is left (float sums of its children's shares)
+_FULLY_CUT = 1 - 1e-9
+
 
 class CutTree:
+    """
+    Tracks which leaves (complete tours) of the search tree have been cut, for the coverage stats.
+
+    Each node keeps the fraction of its own leaves that are cut, as a float,
+    so no factorials are needed: a node with d cities on its path has n - d children,
+    each holding 1 / (n - d) of its leaves. Shares too small for a float are lost,
+    which only happens to cuts far too deep to change the coverage.
+
+    A subtree is collapsed into its root once all of its leaves are cut,
+    so only the frontier of partially cut subtrees is kept.
+
+    With max_depth (the sampling mode), paths are only followed that deep:
+    a deeper cut adds its share to its ancestor at max_depth, capped at what that node has left.
+    Memory and the cost of a cut are then bounded by max_depth. The count is exact
+    as long as the cuts don't overlap (as in B&B, which never expands a cut node)
+    and an estimate otherwise.
+    """
+
     @dataclasses.dataclass
     class Node:
-        n_leaves_cut: int
+        fraction_cut: float
         is_terminal_node: bool = False
         children: dict[int, 'CutTree.Node'] = dataclasses.field(default_factory=dict)
 
-    def __init__(self, num_nodes):
+    def __init__(self, num_nodes, max_depth: int = None):
         self.n = num_nodes
-        self.head = CutTree.Node(0)
+        self.max_depth = num_nodes if max_depth is None else max_depth
+        self.head = CutTree.Node(0.0)
+        self._n_tours = None
 
-    def cut(self, path: list[int]):
+    def _share(self, depth: int, ancestor_depth: int) -> float:
+        """The fraction of the leaves below a path of ancestor_depth cities that lie below one of depth cities"""
+        if depth == ancestor_depth:
+            return 1.0
+        # leaves(d) = (n - d)!, so the share is (n - depth)! / (n - ancestor_depth)!
+        return math.exp(math.lgamma(self.n - depth + 1) - math.lgamma(self.n - ancestor_depth + 1))
 
-        # Find the terminal node
-        # It will be the last node in the path
-        #  or the first terminal node we find along the way
+    def _descend(self, path: list[int]):
+        """
+        The nodes along path (as far as max_depth), built as we go,
+        or None if the path runs into a subtree that is already cut
+        """
         node = self.head
-        for i in path:
+        nodes = [node]
+        for i in path[:self.max_depth]:
             if node.is_terminal_node:
-                # This means we didn't reach the end of the path
-                #  -> so the path cuts nodes that have already been cut
-                # So we can just return
-                return
+                return None
+            child = node.children.get(i)
+            if child is None:
+                child = node.children[i] = CutTree.Node(0.0)
+            node = child
+            nodes.append(node)
+        return None if node.is_terminal_node else nodes
 
-            if i not in node.children:
-                # This path has not been followed before,
-                # so we will build it as we go
-                node.children[i] = CutTree.Node(0)
+    def _add(self, nodes: list['CutTree.Node'], new_fraction_cut: float):
+        """
+        Add new_fraction_cut (a share of the last node's leaves) to the last node,
+        and its part of every ancestor's leaves to the ancestor; collapse the nodes that are now fully cut
+        """
+        collapsing = True
+        for depth in range(len(nodes) - 1, -1, -1):
+            node = nodes[depth]
+            node.fraction_cut += new_fraction_cut
+            # The head is never collapsed: it has no parent to collapse into
+            if collapsing and depth and node.fraction_cut >= _FULLY_CUT:
+                node.fraction_cut = 1.0
+                node.is_terminal_node = True
+                node.children = {}
+            else:
+                collapsing = False
+            if depth:
+                new_fraction_cut /= self.n - depth + 1
 
-            node = node.children[i]
+    def cut(self, path: list[int]):
+        nodes = self._descend(path)
+        if nodes is None:
+            return
 
-        # We've reached the end of the line
-        # The node we have is the terminal (cut) node
-        node.is_terminal_node = True
+        # When the path was cut short by max_depth, its leaves are only part of the last node's
+        depth = len(nodes) - 1
+        node = nodes[-1]
+        self._add(nodes, min(self._share(len(path), depth), 1.0 - node.fraction_cut))
 
-        # How many leaves did we already know where cut?
-        already_cut = node.n_leaves_cut
+    def cut_children(self, path: list[int], cities: list[int]):
+        """Cut path + [city] for every city in cities"""
+        if not cities:
+            return
+        nodes = self._descend(path)
+        if nodes is None:
+            return
 
-        # How many leaves just got cut?
-        node.n_leaves_cut = math.factorial(self.n - len(path))
-        new_leaves_cut = node.n_leaves_cut - already_cut
+        node = nodes[-1]
+        depth = len(nodes) - 1
+        if len(path) >= self.max_depth:
+            self._add(nodes, min(len(cities) * self._share(len(path) + 1, depth), 1.0 - node.fraction_cut))
+            return
 
-        # Now we need to update all the parents with the difference
-        node = self.head
-        for i in path:
-            if node.is_terminal_node:
-                break
-            node.n_leaves_cut += new_leaves_cut
+        share = 1.0 / max(self.n - depth, 1)
+        new_fraction_cut = 0.0
+        for city in cities:
+            child = node.children.get(city)
+            if child is None:
+                node.children[city] = CutTree.Node(1.0, True)
+                new_fraction_cut += share
+            elif not child.is_terminal_node:
+                new_fraction_cut += share * (1.0 - child.fraction_cut)
+                node.children[city] = CutTree.Node(1.0, True)
+        if new_fraction_cut:
+            self._add(nodes, new_fraction_cut)
 
-            node = node.children[i]
-            # If we ended up descending the full path in the first descent
-            # then the last child will be a new terminal node
-            # which already has an accurate n_leaves_cut
-            # -> so we don't need to modify the last node in this descent
+    def fraction_leaves_covered(self):
+        # The first city is fixed, so only 1 / n of the head's leaves are tours
+        return min(self.head.fraction_cut * max(self.n, 1), 1.0)
 
     def n_leaves_cut(self):
-        return self.head.n_leaves_cut
-
-    def fraction_leaves_covered(self):
-        # Subtract 1 from n because the first node is fixed
-        return self.n_leaves_cut() / math.factorial(self.n - 1)
+        """The number of tours cut: exact while (n - 1)! fits a float's precision, rounded beyond"""
+        if not self.head.fraction_cut:
+            return 0
+        if self._n_tours is None:
+            self._n_tours = math.factorial(max(self.n - 1, 0))
+        scaled = round(self.fraction_leaves_covered() * 2 ** 53)
+        return (scaled * self._n_tours + 2 ** 52) >> 53
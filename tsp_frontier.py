@@ -0,0 +1,54 @@
+import heapq
+import itertools
+from typing import Callable
+
+from tsp_search import SearchNode
+
+# A priority function maps a node to its key in the frontier (smaller comes out first)
+Priority = Callable[[SearchNode], float]
+
+
+def depth_weighted(node: SearchNode) -> float:
+    """Lower bound, with a bonus of 2 per city so deeper nodes (and full tours) come out sooner"""
+    return node.bound - 2 * node.depth
+
+
+def lower_bound(node: SearchNode) -> float:
+    """Plain best-first search on the lower bound"""
+    return node.bound
+
+
+def bound_per_depth(node: SearchNode) -> float:
+    """Lower bound per city on the path"""
+    return node.bound / node.depth
+
+
+class Frontier:
+    """
+    A min-heap of search nodes ordered by priority(node).
+
+    Each entry carries an increasing counter, so equal priorities come out
+    in insertion order and the nodes themselves are never compared.
+    Unlike queue.PriorityQueue, no lock is taken on push or pop.
+    """
+
+    def __init__(self, priority: Priority = depth_weighted):
+        self.priority = priority
+        self.max_size = 0
+        self._heap = []
+        self._counter = itertools.count()
+
+    def push(self, node: SearchNode):
+        heapq.heappush(self._heap, (self.priority(node), next(self._counter), node))
+        if len(self._heap) > self.max_size:
+            self.max_size = len(self._heap)
+
+    def extend(self, nodes: list[SearchNode]):
+        for node in nodes:
+            self.push(node)
+
+    def pop(self) -> SearchNode:
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -5,7 +5,7 @@ from tsp_plot import (plot_network, plot_tour, plot_solutions, plot_coverage,
                       plot_queue_size,
                       plot_solution_evolution,
                       plot_edge_probability)
-from tsp_run import format_text_summary, format_plot_summary
+from tsp_run import format_text_summary, format_plot_summary, run_streaming
 
 
 def main(n, find_tour: Solver, timeout=60, **kwargs):
@@ -15,7 +15,7 @@ def main(n, find_tour: Solver, timeout=60, **kwargs):
 
     # Solve
     timer = Timer(timeout)
-    stats = find_tour(edges, timer)
+    stats = run_streaming(find_tour, edges, timer)
     name = find_tour.__name__
     print(format_text_summary(name, stats[-1]))
     print(f'Total solutions found: {len(stats)}')
@@ -0,0 +1,105 @@
+import json
+import math
+from time import perf_counter
+
+from tsp_core import Timer
+
+# What a solver's time is broken down into
+PHASES = ('expansion', 'bound', 'queue', 'cut_tree')
+
+# Why nodes were pruned
+PRUNE_REASONS = ('infeasible', 'bound', 'child_bound')
+
+
+# Only one expanded node in this many is timed (the times are scaled up), which keeps the overhead low
+TIMING_STRIDE = 64
+
+
+class Instruments:
+    """
+    Counters a solver fills in as it runs, when it is given an Instruments.
+
+    times: seconds spent per phase, estimated from every TIMING_STRIDE-th expanded node
+    (the work from that node to the next). node() starts the clock on those nodes and hands the solver lap(),
+    which it calls as each phase ends, so nothing is timed per call.
+    'expansion' is building the children's states (for ReductionBound, the batch of child matrices),
+    'bound' is computing their lower bounds (the matrix reduction, for ReductionBound),
+    'queue' is pushes and pops and 'cut_tree' is CutTree updates.
+    In the other searches 'expansion' is stepping down to a city and listing dfs's candidates,
+    marking and undoing branch_and_bound_inplace's matrix,
+    and building (and reducing) branch_and_bound_edges's two children;
+    'bound' is ReducedMatrix.branch and choosing_edge there, and 'queue' is taking the next candidate
+    (and backing out of finished cities).
+    prunes: pruned nodes per reason: 'infeasible' (the bound is inf),
+    'bound' (a node's bound reached the best tour when it was popped)
+    and 'child_bound' (a child's bound reached it when the child was made).
+    samples: (time, nodes expanded, nodes per second since the last sample),
+    taken every sample_interval seconds.
+    """
+
+    def __init__(self, sample_interval: float = 0.1):
+        self.sample_interval = sample_interval
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.prunes = dict.fromkeys(PRUNE_REASONS, 0)
+        self.samples = []
+        self._next_sample = 0.0
+        self._last_sample = (0.0, 0)
+        self._timing = False
+        self._lap_start = 0.0
+
+    def prune(self, reason: str, bound: float):
+        self.prunes['infeasible' if math.isinf(bound) else reason] += 1
+
+    def prune_children(self, n_pruned: int, n_infeasible: int, reason: str = 'child_bound'):
+        """Count n_pruned nodes (children, by default), n_infeasible of them with an inf bound"""
+        self.prunes['infeasible'] += n_infeasible
+        self.prunes[reason] += n_pruned - n_infeasible
+
+    def node(self, timer: Timer, n_nodes_expanded: int):
+        """
+        Called once per expanded node. Every TIMING_STRIDE-th node is timed, from here to the next node:
+        this returns lap for it (None for the rest), which the solver calls as each phase ends,
+        and the rest (getting to the next node) is counted as 'queue'.
+        A sample is taken on a timed node when one is due.
+        """
+        if self._timing:
+            self._timing = False
+            self.lap('queue')
+        if n_nodes_expanded % TIMING_STRIDE:
+            return None
+        now = timer.time()
+        if now >= self._next_sample:
+            last_time, last_expanded = self._last_sample
+            rate = (n_nodes_expanded - last_expanded) / (now - last_time) if now > last_time else 0.0
+            self.samples.append((now, n_nodes_expanded, rate))
+            self._last_sample = (now, n_nodes_expanded)
+            self._next_sample = now + self.sample_interval
+        self._timing = True
+        self._lap_start = perf_counter()
+        return self.lap
+
+    def lap(self, phase: str):
+        """Add the time since node() or the last lap to phase"""
+        now = perf_counter()
+        self.times[phase] += (now - self._lap_start) * TIMING_STRIDE
+        self._lap_start = now
+
+    def to_dict(self) -> dict:
+        return {'sample_interval': self.sample_interval, 'times': self.times,
+                'prunes': self.prunes, 'samples': self.samples}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'Instruments':
+        instruments = Instruments(data['sample_interval'])
+        instruments.times.update(data['times'])
+        instruments.prunes.update(data['prunes'])
+        instruments.samples = [tuple(sample) for sample in data['samples']]
+        return instruments
+
+    def to_json(self, path: str = None) -> str:
+        """The counters as JSON, also written to path if it is given"""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
@@ -0,0 +1,401 @@
+import random
+from collections import deque
+from typing import Callable
+
+import numpy as np
+from math import inf
+
+from tsp_core import SolutionStats, Timer, Solver, Tour, score_tour
+from tsp_cuttree import CutTree
+from tsp_solve import greedy_tour
+from tsp_stats import add_stats
+
+# An improver takes a tour, the edge matrix as an ndarray and a timer and returns a tour no worse
+Improver = Callable[[Tour, np.ndarray, Timer], Tour]
+
+# How often (in queue pops) the local searches check the timer
+_TIMER_CHECK_INTERVAL = 128
+
+# Moves must gain more than this, so float noise cannot make a search cycle
+_EPSILON = 1e-9
+
+# How many start cities greedy_start tries: a few starts cost about as much as one,
+# while all n of them would not finish in a construction budget on thousands of cities
+CONSTRUCT_STARTS = 8
+
+
+def neighbour_lists(graph: np.ndarray, k: int = 8, chunk: int = 1024) -> np.ndarray:
+    """
+    The k nearest cities of every city (by outgoing edge), nearest first, as an (n, k) array.
+    Rows are processed in chunks so large matrices do not need an n x n temporary.
+    """
+    n = len(graph)
+    k = min(k, n - 1)
+    neighbours = np.empty((n, k), dtype=int)
+    for first in range(0, n, chunk):
+        rows = np.array(graph[first:first + chunk], dtype=float)
+        rows[np.arange(len(rows)), np.arange(first, first + len(rows))] = inf
+        nearest = np.argpartition(rows, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(rows, nearest, axis=1).argsort(axis=1)
+        neighbours[first:first + chunk] = np.take_along_axis(nearest, order, axis=1)
+    return neighbours
+
+
+class ArrayTour:
+    """
+    A tour stored as an array of cities plus each city's position in it,
+    so succ/pred/between are O(1) and a segment can be reversed in place.
+    """
+
+    def __init__(self, tour: Tour):
+        self.n = len(tour)
+        self.order = np.array(tour, dtype=int)
+        self.pos = np.empty(self.n, dtype=int)
+        self.pos[self.order] = np.arange(self.n)
+
+    def succ(self, city: int) -> int:
+        return int(self.order[(self.pos[city] + 1) % self.n])
+
+    def pred(self, city: int) -> int:
+        return int(self.order[self.pos[city] - 1])
+
+    def between(self, a: int, b: int, c: int) -> bool:
+        """Whether b is reached when walking forward from a to c (inclusive)"""
+        pa, pb, pc = self.pos[a], self.pos[b], self.pos[c]
+        if pa <= pc:
+            return pa <= pb <= pc
+        return pb >= pa or pb <= pc
+
+    def reverse(self, first: int, last: int):
+        """
+        Reverse the path first ... last (walking forward).
+        On a symmetric instance reversing the rest of the tour instead is the same cycle,
+        so whichever side is shorter is reversed.
+        """
+        i, j = self.pos[first], self.pos[last]
+        length = (j - i) % self.n + 1
+        if 2 * length > self.n:
+            i, j = (j + 1) % self.n, (i - 1) % self.n
+            length = self.n - length
+        if length < 2:
+            return
+        index = (i + np.arange(length)) % self.n
+        segment = self.order[index[::-1]]
+        self.order[index] = segment
+        self.pos[segment] = index
+
+    def exchange(self, x: int, y: int, z: int):
+        """
+        The tour is three consecutive paths X Y Z, starting at cities x, y and z.
+        Reorder it to X Z Y (the same cycle as Y X Z and Z Y X) without reversing anything.
+        Only the two shorter paths are moved.
+        """
+        px, py, pz = self.pos[x], self.pos[y], self.pos[z]
+        lx, ly = (py - px) % self.n, (pz - py) % self.n
+        lz = self.n - lx - ly
+        if lz >= lx and lz >= ly:
+            start, first, length = px, lx, lx + ly
+        elif lx >= ly:
+            start, first, length = py, ly, ly + lz
+        else:
+            start, first, length = pz, lz, lz + lx
+
+        index = (start + np.arange(length)) % self.n
+        moved = np.roll(self.order[index], -first)
+        self.order[index] = moved
+        self.pos[moved] = index
+
+    def tolist(self) -> Tour:
+        return self.order.tolist()
+
+
+def is_symmetric(graph: np.ndarray) -> bool:
+    return np.array_equal(graph, graph.T)
+
+
+def _queue_cities(queue, queued, cities):
+    for city in cities:
+        if not queued[city]:
+            queued[city] = True
+            queue.append(city)
+
+
+def two_opt_improve(tour: Tour, graph: np.ndarray, timer: Timer,
+                    neighbours: np.ndarray = None, k: int = 8) -> Tour:
+    """
+    2-opt on a symmetric instance.
+
+    Only moves that connect a city to one of its k nearest neighbours are tried,
+    scored in O(1) from the four edges involved. Cities whose surroundings have not
+    changed since they last failed to improve are not looked at again (don't-look bits):
+    only cities in the work queue are examined, and a move queues its four endpoints.
+    Asymmetric instances are returned unchanged, since a reversal changes their cost.
+    """
+    n = len(tour)
+    if n < 5 or not is_symmetric(graph):
+        return list(tour)
+    if neighbours is None:
+        neighbours = neighbour_lists(graph, k)
+
+    near = neighbours.tolist()
+    near_cost = np.take_along_axis(graph, neighbours, axis=1).tolist()
+    array_tour = ArrayTour(tour)
+    queue = deque(array_tour.tolist())
+    queued = [True] * n
+    pops = 0
+
+    # inf - inf (two missing edges) gives nan, which never counts as a gain
+    with np.errstate(invalid='ignore'):
+        while queue:
+            pops += 1
+            if pops % _TIMER_CHECK_INTERVAL == 0 and timer.time_out():
+                break
+
+            a = queue.popleft()
+            queued[a] = False
+
+            for forward in (True, False):
+                b = array_tour.succ(a) if forward else array_tour.pred(a)
+                d_ab = graph[a, b]
+                move = None
+
+                for c, d_ac in zip(near[a], near_cost[a]):
+                    # Any gain needs the new edge a-c to be shorter than the removed a-b
+                    if not d_ac < d_ab:
+                        break
+                    d = array_tour.succ(c) if forward else array_tour.pred(c)
+                    if c == b or d == a:
+                        continue
+                    delta = d_ac + graph[b, d] - d_ab - graph[c, d]
+                    if delta < -_EPSILON:
+                        move = (c, d)
+                        break
+
+                if move is None:
+                    continue
+
+                c, d = move
+                if forward:
+                    # ... a b ... c d ...  ->  ... a c ... b d ...
+                    array_tour.reverse(b, c)
+                else:
+                    # ... d c ... b a ...  ->  ... d b ... c a ...
+                    array_tour.reverse(c, b)
+                _queue_cities(queue, queued, (a, b, c, d))
+                break
+
+    return array_tour.tolist()
+
+
+def or_opt_improve(tour: Tour, graph: np.ndarray, timer: Timer,
+                   neighbours: np.ndarray = None, k: int = 8, max_segment: int = 3) -> Tour:
+    """
+    Or-opt: move a path of 1 to max_segment cities to another place in the tour,
+    keeping its direction, so the move is valid (and O(1) to score) on asymmetric instances.
+
+    The path s1 ... s2 (between p and nx) is tried between c and d = succ(c)
+    for c among the cities with the cheapest edges into s1,
+    and for d among the cities with the cheapest edges out of s2.
+    Uses the same work queue (don't-look bits) as two_opt_improve.
+    """
+    n = len(tour)
+    if n < max_segment + 3:
+        max_segment = n - 3
+    if max_segment < 1:
+        return list(tour)
+    if neighbours is None:
+        neighbours = neighbour_lists(graph, k)
+    out_near = neighbours.tolist()
+    in_near = neighbour_lists(graph.T, neighbours.shape[1]).tolist()
+
+    array_tour = ArrayTour(tour)
+    queue = deque(array_tour.tolist())
+    queued = [True] * n
+    pops = 0
+
+    with np.errstate(invalid='ignore'):
+        while queue:
+            pops += 1
+            if pops % _TIMER_CHECK_INTERVAL == 0 and timer.time_out():
+                break
+
+            s1 = queue.popleft()
+            queued[s1] = False
+            p = array_tour.pred(s1)
+            s2 = s1
+            move = None
+
+            for _ in range(max_segment):
+                nx = array_tour.succ(s2)
+                removed = graph[p, s1] + graph[s2, nx] - graph[p, nx]
+                if removed > _EPSILON:
+                    candidates = [(c, array_tour.succ(c)) for c in in_near[s1]]
+                    candidates += [(array_tour.pred(d), d) for d in out_near[s2]]
+                    for c, d in candidates:
+                        if c == p or array_tour.between(s1, c, s2):
+                            continue
+                        gain = removed + graph[c, d] - graph[c, s1] - graph[s2, d]
+                        if gain > _EPSILON:
+                            move = (c, d)
+                            break
+                if move is not None:
+                    break
+                s2 = nx
+
+            if move is None:
+                continue
+
+            # ... p [s1 ... s2] nx ... c d ...  ->  ... p nx ... c [s1 ... s2] d ...
+            c, d = move
+            array_tour.exchange(s1, nx, d)
+            _queue_cities(queue, queued, (p, s1, s2, nx, c, d))
+
+    return array_tour.tolist()
+
+
+def three_opt_improve(tour: Tour, graph: np.ndarray, timer: Timer,
+                      neighbours: np.ndarray = None, k: int = 8) -> Tour:
+    """
+    Segment-exchange 3-opt ("or3opt"), the one pure 3-opt move that reverses nothing:
+    remove a1->a2, b1->b2, c1->c2 and reconnect a1->b2, c1->a2, b1->c2,
+    which swaps the paths a2 ... b1 and b2 ... c1.
+
+    b2 is taken from a1's nearest cities and c2 from b1's nearest, and a candidate
+    is only followed while the partial gain stays positive, so each city costs O(k^2).
+    Valid on asymmetric instances.
+    """
+    n = len(tour)
+    if n < 5:
+        return list(tour)
+    if neighbours is None:
+        neighbours = neighbour_lists(graph, k)
+    near = neighbours.tolist()
+    near_cost = np.take_along_axis(graph, neighbours, axis=1).tolist()
+
+    array_tour = ArrayTour(tour)
+    queue = deque(array_tour.tolist())
+    queued = [True] * n
+    pops = 0
+
+    with np.errstate(invalid='ignore'):
+        while queue:
+            pops += 1
+            if pops % _TIMER_CHECK_INTERVAL == 0 and timer.time_out():
+                break
+
+            a1 = queue.popleft()
+            queued[a1] = False
+            a2 = array_tour.succ(a1)
+            g1 = graph[a1, a2]
+            move = None
+
+            for b2, d_a1b2 in zip(near[a1], near_cost[a1]):
+                if not d_a1b2 < g1:
+                    break
+                if b2 == a2:
+                    continue
+                b1 = array_tour.pred(b2)
+                g2 = g1 - d_a1b2 + graph[b1, b2]
+
+                for c2, d_b1c2 in zip(near[b1], near_cost[b1]):
+                    if not d_b1c2 < g2:
+                        break
+                    c1 = array_tour.pred(c2)
+                    # c1 must lie on b2 ... a1 (and not be a1), so the three paths are in tour order
+                    if c1 == a1 or not array_tour.between(b2, c1, a1):
+                        continue
+                    gain = g2 - d_b1c2 + graph[c1, c2] - graph[c1, a2]
+                    if gain > _EPSILON:
+                        move = (b1, b2, c1, c2)
+                        break
+                if move is not None:
+                    break
+
+            if move is None:
+                continue
+
+            b1, b2, c1, c2 = move
+            array_tour.exchange(a2, b2, c2)
+            _queue_cities(queue, queued, (a1, a2, b1, b2, c1, c2))
+
+    return array_tour.tolist()
+
+
+def improve(edges: list[list[float]], timer: Timer, stats: list[SolutionStats],
+            improvers: tuple[Improver, ...] = (two_opt_improve,)) -> list[SolutionStats]:
+    """
+    Post-process a solver's output: run the improvers on its best tour, in turn,
+    until none of them helps (or time runs out), and append the result if it is better.
+    """
+
+    best = [st for st in stats if st.tour]
+    if not best:
+        return stats
+    tour = best[-1].tour
+    cost = score_tour(tour, edges)
+
+    graph = np.asarray(edges, dtype=float)
+    improved = True
+    while improved and not timer.time_out():
+        improved = False
+        for improver in improvers:
+            candidate = improver(tour, graph, timer)
+            candidate_cost = score_tour(candidate, edges)
+            if candidate_cost < cost:
+                tour, cost, improved = candidate, candidate_cost, True
+
+    stats, _ = add_stats(list(stats), timer, best[-1].n_nodes_expanded, best[-1].n_nodes_pruned,
+                         CutTree(len(edges)), "local search", tour, edges, best[-1].score)
+    return stats
+
+
+def starting_tour(construct: Solver, edges: list[list[float]], timer: Timer,
+                  time_limit: float) -> list[SolutionStats]:
+    """
+    The tours construct finds in time_limit seconds (or a random tour if none),
+    followed by the timer's best tour if that is better, e.g. one another portfolio solver found
+    """
+    stats = [st for st in construct(edges, timer.child(time_limit)) if st.tour]
+    if not stats:
+        tour = random.sample(range(len(edges)), len(edges))
+        stats = [SolutionStats(tour, score_tour(tour, edges), timer.time(), 1, 0, 0, 0, 0.0)]
+    return outside_tour(edges, timer, stats)
+
+
+def outside_tour(edges: list[list[float]], timer: Timer, stats: list[SolutionStats]) -> list[SolutionStats]:
+    """stats, followed by the timer's best tour if it beats the last of them"""
+    if not timer.upper_bound() < stats[-1].score - _EPSILON:
+        return stats
+    tour = timer.best_tour()
+    if not tour:
+        return stats
+    return stats + [SolutionStats(tour, score_tour(tour, edges), timer.time(), 1, 0, 0, 0, 0.0)]
+
+
+def with_improvement(construct: Solver, *improvers: Improver, construct_fraction: float = 0.2) -> Solver:
+    """
+    A Solver that builds a tour with construct (given construct_fraction of the time limit)
+    and then improves it with the improvers for the rest of the time.
+    """
+
+    def solve(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+        stats = starting_tour(construct, edges, timer, timer.time_limit * construct_fraction)
+        return improve(edges, timer, stats, improvers or (two_opt_improve,))
+
+    solve.__name__ = f'{construct.__name__}_improved'
+    return solve
+
+
+def greedy_start(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+    """greedy_tour from CONSTRUCT_STARTS start cities, as a quick starting tour for a local search"""
+    return greedy_tour(edges, timer, starts=CONSTRUCT_STARTS)
+
+
+def two_opt(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+    """Greedy construction followed by neighbour-list 2-opt"""
+    return with_improvement(greedy_start, two_opt_improve)(edges, timer)
+
+
+def or_opt(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+    """Greedy construction followed by Or-opt and segment-exchange 3-opt; suits asymmetric instances"""
+    return with_improvement(greedy_start, or_opt_improve, three_opt_improve)(edges, timer)
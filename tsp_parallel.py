@@ -0,0 +1,214 @@
+import dataclasses
+import math
+import multiprocessing as mp
+import os
+import queue
+import time
+
+from tsp_core import DistanceMatrix, SolutionStats, Timer, score_tour
+from tsp_cuttree import CutTree
+from tsp_search import SearchNode
+from tsp_bounds import ReductionBound
+from tsp_solve import greedy_tour, branch_and_bound, WARM_START_STARTS
+from tsp_stats import empty_stats
+
+# Split the tree until there are this many subproblems per worker
+SUBPROBLEMS_PER_PROCESS = 4
+
+_TIMER_CHECK_INTERVAL = 64
+
+# How often (in seconds) the parent checks its timer and passes on the workers' solutions while they run
+_POLL_INTERVAL = 0.05
+
+# Workers are spawned rather than forked: the solver may be running in a thread (as streaming runs it),
+# and forking a multithreaded process can deadlock the child
+_context = mp.get_context('spawn')
+
+# Set in each worker by _init_worker
+_worker = {}
+
+
+def _init_worker(edges, incumbent, stop, found, start, time_limit):
+    _worker.update(edges=edges, incumbent=incumbent, stop=stop, found=found,
+                   start=start, deadline=start + time_limit)
+
+
+def split(edges: list[list[float]], bssf_cost: float, count: int, cut_tree: CutTree):
+    """
+    Expand the top of the B&B tree breadth-first until there are at least count open nodes
+    (or the next level would complete the tour). Returns the open nodes, best bound first,
+    and the number of nodes expanded and pruned on the way.
+    """
+    n = len(edges)
+    bound = ReductionBound()
+    graph, lower_bound = bound.root(edges)
+    level = [SearchNode.root(0, lower_bound, graph)] if lower_bound < bssf_cost else []
+    n_expanded = n_pruned = 0
+
+    while level and len(level) < count and level[0].depth < n - 2:
+        below = []
+        for node in level:
+            n_expanded += 1
+            remaining = node.unvisited(n)
+            states, bounds = bound.children(node, remaining, bssf_cost)
+            for city, state, child_bound in zip(remaining, states, bounds):
+                if child_bound < bssf_cost:
+                    below.append(node.child(city, edges[node.city][city], child_bound, state))
+                else:
+                    n_pruned += 1
+                    cut_tree.cut(node.path() + [city])
+        level = below
+
+    level.sort(key=lambda node: node.bound)
+    return level, n_expanded, n_pruned
+
+
+def _search(task):
+    """
+    Depth-first B&B below one subproblem, pruning against the shared incumbent.
+    Each improving solution is also put on the found queue as soon as it is made.
+    Stops at the deadline, or once the parent sets stop.
+    Returns the worker's improving solutions and its counters.
+    """
+    path, lower_bound, graph = task
+    edges = _worker['edges']
+    incumbent, stop, found = _worker['incumbent'], _worker['stop'], _worker['found']
+    start, deadline = _worker['start'], _worker['deadline']
+    n = len(edges)
+    bound = ReductionBound()
+
+    node = SearchNode.root(path[0], lower_bound)
+    for city in path[1:]:
+        node = node.child(city, edges[node.city][city], lower_bound)
+    node.graph = graph
+
+    stats = []
+    cut_tree = CutTree(n)
+    n_expanded = n_pruned = 0
+    stack = [node]
+    max_stack = 1
+
+    while stack:
+        if n_expanded % _TIMER_CHECK_INTERVAL == 0 and (stop.value or time.time() > deadline):
+            break
+        node = stack.pop()
+        n_expanded += 1
+        bssf_cost = incumbent.value
+
+        if node.bound >= bssf_cost:
+            n_pruned += 1
+            cut_tree.cut(node.path())
+            continue
+
+        if node.is_complete(n):
+            tour = node.path()
+            cost = score_tour(tour, edges)
+            with incumbent.get_lock():
+                improved = cost < incumbent.value
+                if improved:
+                    incumbent.value = cost
+            if improved:
+                stats.append(SolutionStats(tour, cost, time.time() - start, max_stack, n_expanded, n_pruned,
+                                           cut_tree.n_leaves_cut(), cut_tree.fraction_leaves_covered()))
+                found.put(stats[-1])
+            continue
+
+        remaining = node.unvisited(n)
+        states, bounds = bound.children(node, remaining, bssf_cost)
+        children = []
+        for city, state, child_bound in zip(remaining, states, bounds):
+            if child_bound < bssf_cost:
+                children.append(node.child(city, edges[node.city][city], child_bound, state))
+            else:
+                n_pruned += 1
+                cut_tree.cut(node.path() + [city])
+
+        # Push the best child last, so it is searched first
+        children.sort(key=lambda child: child.bound, reverse=True)
+        stack.extend(children)
+        max_stack = max(max_stack, len(stack))
+
+    return stats, n_expanded, n_pruned, max_stack, cut_tree.n_leaves_cut()
+
+
+def _record(live, timer: Timer, recorded: float) -> float:
+    """Record the improvements waiting on the live queue on timer; returns the best cost recorded"""
+    while True:
+        try:
+            stat = live.get_nowait()
+        except queue.Empty:
+            return recorded
+        if stat.score < recorded:
+            recorded = stat.score
+            timer.record(stat)
+
+
+def branch_and_bound_parallel(edges: list[list[float]], timer: Timer, processes: int = None) -> list[SolutionStats]:
+    """
+    B&B with the top of the tree split into subproblems, which a multiprocessing pool
+    searches depth-first (best bound first). Workers share the best tour cost
+    through a shared-memory Value, so a tour found by one worker tightens pruning in all of them.
+
+    The workers' improving solutions are recorded on timer as they come in,
+    and merged by time into one history when the pool is done.
+    Counters in that history are each worker's own, except for the last entry,
+    which carries the totals over all workers.
+    Once timer times out (or a stream stops it), the workers are told to stop.
+    """
+
+    n = len(edges)
+    if n < 4:
+        return branch_and_bound(edges, timer)
+
+    processes = processes or os.cpu_count() or 1
+    greedy = [st for st in greedy_tour(edges, timer.child(3), starts=WARM_START_STARTS) if st.tour]
+    history = greedy[-1:]
+    bssf_cost = min(greedy[-1].score if greedy else math.inf, timer.upper_bound())
+
+    cut_tree = CutTree(n)
+    subproblems, n_expanded, n_pruned = split(edges, bssf_cost, processes * SUBPROBLEMS_PER_PROCESS, cut_tree)
+    tasks = [(node.path(), node.bound, node.graph) for node in subproblems]
+    n_leaves = cut_tree.n_leaves_cut()
+    max_queue_size = len(tasks)
+
+    incumbent = _context.Value('d', bssf_cost)
+    stop = _context.Value('b', 0, lock=False)
+    live = _context.Queue()
+    recorded = history[-1].score if history else math.inf
+    found = []
+    # The workers attach to the weights in shared memory instead of each getting a pickled copy
+    with DistanceMatrix.shared(edges) as shared_edges:
+        initargs = (shared_edges, incumbent, stop, live, timer.start, timer.time_limit)
+        with _context.Pool(processes, initializer=_init_worker, initargs=initargs) as pool:
+            results = pool.imap_unordered(_search, tasks)
+            for _ in tasks:
+                while True:
+                    if timer.time_out():
+                        stop.value = 1
+                    recorded = _record(live, timer, recorded)
+                    try:
+                        stats, expanded, pruned, max_stack, leaves = results.next(timeout=_POLL_INTERVAL)
+                        break
+                    except mp.TimeoutError:
+                        pass
+                found.extend(stats)
+                n_expanded += expanded
+                n_pruned += pruned
+                n_leaves += leaves
+                max_queue_size = max(max_queue_size, max_stack)
+
+    for stat in sorted(found, key=lambda stat: stat.time):
+        if not history or stat.score < history[-1].score:
+            history.append(stat)
+
+    if not history:
+        return empty_stats(timer, edges)
+    history[-1] = dataclasses.replace(
+        history[-1],
+        max_queue_size=max_queue_size,
+        n_nodes_expanded=n_expanded,
+        n_nodes_pruned=n_pruned,
+        n_leaves_covered=n_leaves,
+        fraction_leaves_covered=n_leaves / math.factorial(n - 1)
+    )
+    return history
@@ -3,6 +3,7 @@ import math
 
 import matplotlib.pyplot as plt
 from tsp_core import get_segments, Location, Tour, SolutionStats, score_tour, score_partial_tour
+from tsp_instrument import Instruments, PHASES
 
 
 def add_axes(func):
@@ -161,3 +162,29 @@ def plot_solution_evolution(
         ax: plt.Axes = None
 ):
     ax.imshow(solutions)
+
+
+@add_axes
+def plot_time_breakdown(instruments: dict[str, Instruments], ax=None):
+    """Stacked bars of where each solver's time went"""
+    names = list(instruments)
+    bottoms = [0.0] * len(names)
+    for phase in PHASES:
+        heights = [instruments[name].times[phase] for name in names]
+        ax.bar(names, heights, bottom=bottoms, label=phase)
+        bottoms = [b + h for b, h in zip(bottoms, heights)]
+
+    ax.legend()
+    ax.set_ylabel('Time (s)')
+
+
+@add_axes
+def plot_node_rate(instruments: dict[str, Instruments], ax=None):
+    for name, inst in instruments.items():
+        x = [sample[0] for sample in inst.samples]
+        y = [sample[2] for sample in inst.samples]
+        ax.plot(x, y, marker='o')
+
+    ax.legend(labels=instruments.keys())
+    ax.set_xlabel('Time (s)')
+    ax.set_ylabel('Nodes expanded per second')
@@ -0,0 +1,152 @@
+import dataclasses
+import multiprocessing as mp
+import queue
+import time
+from math import inf
+
+from tsp_core import DistanceMatrix, SolutionStats, Solver, Timer, Tour
+from tsp_stats import empty_stats
+
+# How long after the deadline a solver process gets to hand in its results before it is stopped
+GRACE_PERIOD = 2.0
+
+# Solver processes are spawned rather than forked: the portfolio may be running in a thread
+# (as streaming runs it), and forking a multithreaded process can deadlock the child
+_context = mp.get_context('spawn')
+
+
+class Incumbent:
+    """The best tour any portfolio solver has found, in shared memory"""
+
+    def __init__(self, n: int, cost: float = inf):
+        self._cost = _context.Value('d', cost)
+        self._tour = _context.Array('i', n, lock=False)
+
+    @property
+    def cost(self) -> float:
+        return self._cost.value
+
+    def tour(self) -> Tour:
+        with self._cost.get_lock():
+            return list(self._tour) if self._cost.value < inf else []
+
+    def offer(self, tour: Tour, cost: float) -> bool:
+        """Replace the incumbent if tour is better. Returns whether it was."""
+        with self._cost.get_lock():
+            if not cost < self._cost.value:
+                return False
+            self._cost.value = cost
+            self._tour[:] = tour
+            return True
+
+
+class SharedTimer(Timer):
+    """
+    The Timer a portfolio solver runs with: it counts from the start of the portfolio,
+    records the solver's improvements to the shared incumbent and to the log,
+    and gives the incumbent as the upper bound and best tour.
+    """
+
+    def __init__(self, time_limit: float, start: float, incumbent: Incumbent, name: str, log: mp.Queue):
+        super().__init__(time_limit)
+        self.start = start
+        self.incumbent = incumbent
+        self.name = name
+        self.log = log
+
+    def record(self, stats: SolutionStats):
+        self.incumbent.offer(stats.tour, stats.score)
+        self.log.put((self.name, stats))
+
+    def upper_bound(self) -> float:
+        return self.incumbent.cost
+
+    def best_tour(self) -> Tour:
+        return self.incumbent.tour()
+
+
+@dataclasses.dataclass
+class PortfolioResult:
+    best: SolutionStats
+    timelines: dict[str, list[SolutionStats]]
+
+
+def _run(solver: Solver, edges, timer: SharedTimer, results: mp.Queue):
+    results.put((timer.name, solver(edges, timer)))
+
+
+def portfolio(edges: list[list[float]], timer: Timer, *solvers: Solver) -> PortfolioResult:
+    """
+    Race the solvers against each other, one process each, all under timer's budget.
+
+    Solutions the solvers record (see Timer.record) are offered to a shared incumbent,
+    and the B&B solvers prune against it (Timer.upper_bound), so e.g. a local search tour
+    becomes an upper bound for B&B as soon as it is found. The local searches
+    start from it (Timer.best_tour) when it beats their own starting tour.
+    Each solver's timeline is the list it returns, or, if it has to be stopped,
+    the solutions it shared before that.
+    """
+    incumbent = Incumbent(len(edges))
+    log = _context.Queue()
+    results = _context.Queue()
+
+    names = [solver.__name__ for solver in solvers]
+    shared = {name: [] for name in names}
+    returned = {}
+    # The solver processes attach to the weights in shared memory instead of each getting a pickled copy
+    with DistanceMatrix.shared(edges) as shared_edges:
+        processes = []
+        for solver, name in zip(solvers, names):
+            solver_timer = SharedTimer(timer.time_limit, timer.start, incumbent, name, log)
+            processes.append(_context.Process(target=_run, args=(solver, shared_edges, solver_timer, results)))
+        for process in processes:
+            process.start()
+
+        deadline = time.time() + timer.time_limit - timer.time() + GRACE_PERIOD
+        while len(returned) < len(processes) and time.time() < deadline:
+            try:
+                name, stats = results.get(timeout=min(0.1, max(deadline - time.time(), 0)))
+                returned[name] = stats
+            except queue.Empty:
+                pass
+            _drain(log, shared)
+
+        for process in processes:
+            # Keep reading the log, so a process that is still writing to it can exit
+            while process.is_alive() and time.time() < deadline:
+                _drain(log, shared)
+                process.join(0.05)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        _drain(log, shared)
+
+    timelines = {name: returned.get(name) or shared[name] or empty_stats(timer, edges) for name in names}
+    best = min((stats[-1] for stats in timelines.values()), key=lambda stats: stats.score)
+    return PortfolioResult(best, timelines)
+
+
+def _drain(log: mp.Queue, shared: dict[str, list[SolutionStats]]):
+    while True:
+        try:
+            name, stats = log.get_nowait()
+        except queue.Empty:
+            return
+        shared[name].append(stats)
+
+
+def racing(*solvers: Solver) -> Solver:
+    """A Solver that runs the solvers as a portfolio and reports every improvement any of them made"""
+
+    def solve(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+        result = portfolio(edges, timer, *solvers)
+        history = []
+        found = sorted((stats for timeline in result.timelines.values() for stats in timeline),
+                       key=lambda stats: stats.time)
+        for stats in found:
+            if stats.tour and (not history or stats.score < history[-1].score):
+                history.append(stats)
+        return history or empty_stats(timer, edges)
+
+    solve.__name__ = '_'.join(solver.__name__ for solver in solvers) + '_racing'
+    return solve
@@ -4,6 +4,9 @@ import matplotlib.pyplot as plt
 
 from tsp_core import (generate_network, Timer, Solver, SolutionStats)
 from tsp_plot import (plot_solutions, plot_solution_progress_compared, plot_tour)
+from tsp_portfolio import portfolio
+from tsp_stream import streaming
+from tsp_stats import empty_stats
 
 
 def format_text_summary(name: str, stats: SolutionStats):
@@ -26,7 +29,21 @@ def format_plot_summary(name: str, stats: SolutionStats):
     )
 
 
-def main(n, *find_tours: Solver, timeout=60, **kwargs):
+def run_streaming(find_tour: Solver, edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+    """Run a solver, printing each improvement as soon as it is found"""
+    name = find_tour.__name__
+    stats = []
+    for solution in streaming(find_tour)(edges, timer):
+        print(f'{name}: {round(solution.score, 3)} after {round(solution.time, 4)} sec')
+        stats.append(solution)
+    return stats or empty_stats(timer, edges)
+
+
+def main(n, *find_tours: Solver, timeout=60, race=False, **kwargs):
+    """
+    Run each solver on the same network (each with the full timeout) and plot the results.
+    With race=True the solvers run at the same time, sharing one timeout and their best tours.
+    """
     # Generate
     print(f'Generating network of size {n} with args: {kwargs}')
     locations, edges = generate_network(n, **kwargs)
@@ -35,12 +52,15 @@ def main(n, *find_tours: Solver, timeout=60, **kwargs):
     print('Running TSP Solvers...')
 
     all_stats = {}
-    find_tour: Solver
-    for find_tour in find_tours:
-        timer = Timer(timeout)
-        stats = find_tour(edges, timer)
-        name = find_tour.__name__
-        all_stats[name] = stats
+    if race:
+        all_stats = portfolio(edges, Timer(timeout), *find_tours).timelines
+    else:
+        find_tour: Solver
+        for find_tour in find_tours:
+            timer = Timer(timeout)
+            all_stats[find_tour.__name__] = run_streaming(find_tour, edges, timer)
+
+    for name, stats in all_stats.items():
         if stats:
             print(format_text_summary(name, stats[-1]))
         else:
@@ -72,6 +92,11 @@ def main(n, *find_tours: Solver, timeout=60, **kwargs):
 
 if __name__ == '__main__':
     from tsp_solve import (random_tour, greedy_tour, dfs, branch_and_bound, branch_and_bound_smart)
+    from lin_kernighan import lin_kernighan
+    from simulated_annealing import simulated_annealing
+    from genetic import genetic
+    from ant_colony import ant_colony
+    from tsp_parallel import branch_and_bound_parallel
 
     main(
         50,
@@ -80,6 +105,11 @@ if __name__ == '__main__':
         dfs,
         branch_and_bound,
         branch_and_bound_smart,
+        branch_and_bound_parallel,
+        lin_kernighan,
+        simulated_annealing,
+        genetic,
+        ant_colony,
         euclidean=True,
         reduction=0.2,
         normal=False,
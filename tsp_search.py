@@ -0,0 +1,81 @@
+from array import array
+
+import numpy as np
+
+
+class PathArena:
+    """
+    The paths of one search's nodes, shared by all of them.
+
+    Entry i is a city and the index of the entry before it on the path (-1 for a root),
+    both kept in int arrays, so siblings share their common prefix at 8 bytes an entry.
+    Entries are only ever appended: the arena grows by one entry per node made.
+    """
+    __slots__ = ('cities', 'parents')
+
+    def __init__(self):
+        self.cities = array('i')
+        self.parents = array('i')
+
+    def add(self, city: int, parent: int) -> int:
+        """Append city after entry parent; returns the new entry's index"""
+        self.cities.append(city)
+        self.parents.append(parent)
+        return len(self.cities) - 1
+
+    def path(self, index: int, depth: int) -> list[int]:
+        """The depth cities on the path ending at entry index"""
+        cities, parents = self.cities, self.parents
+        path = [0] * depth
+        for i in range(depth - 1, -1, -1):
+            path[i] = cities[index]
+            index = parents[index]
+        return path
+
+
+class SearchNode:
+    """
+    One partial path in a B&B search.
+
+    visited is a bitmask of the cities on the path (bit i set -> city i visited),
+    and the path itself is an entry (index) in the PathArena its search shares.
+    A node holds an index rather than its parent, so an expanded node (and its graph) is freed
+    as soon as the solver lets go of it, whatever is left of its subtree in the frontier.
+    cost is the weight of the path so far and bound is its lower bound.
+    graph is whatever the solver needs to bound the node's children (e.g. its reduced matrix).
+    """
+    __slots__ = ('arena', 'index', 'city', 'visited', 'cost', 'bound', 'graph')
+
+    def __init__(self, arena: PathArena, index: int, city: int, visited: int,
+                 cost: float, bound: float, graph: np.ndarray = None):
+        self.arena = arena
+        self.index = index
+        self.city = city
+        self.visited = visited
+        self.cost = cost
+        self.bound = bound
+        self.graph = graph
+
+    @staticmethod
+    def root(city: int, bound: float, graph: np.ndarray = None) -> 'SearchNode':
+        arena = PathArena()
+        return SearchNode(arena, arena.add(city, -1), city, 1 << city, 0, bound, graph)
+
+    def child(self, city: int, move_cost: float, bound: float, graph: np.ndarray = None) -> 'SearchNode':
+        arena = self.arena
+        return SearchNode(arena, arena.add(city, self.index), city, self.visited | (1 << city),
+                          self.cost + move_cost, bound, graph)
+
+    @property
+    def depth(self) -> int:
+        return self.visited.bit_count()
+
+    def path(self) -> list[int]:
+        return self.arena.path(self.index, self.depth)
+
+    def unvisited(self, n: int) -> list[int]:
+        visited = self.visited
+        return [city for city in range(n) if not (visited >> city) & 1]
+
+    def is_complete(self, n: int) -> bool:
+        return self.visited == (1 << n) - 1
@@ -1,16 +1,21 @@
 import math
 import random
-from collections import deque
-import copy
-import queue
 
-from tsp_core import Tour, SolutionStats, Timer, score_tour, Solver
+import numpy as np
+
+from tsp_core import Tour, SolutionStats, Timer, score_tour, Solver, as_lists
 from tsp_cuttree import CutTree
+from tsp_search import SearchNode
+from tsp_frontier import Frontier, Priority, depth_weighted
+from tsp_bounds import BoundProvider, ReductionBound
 from math import inf
 
-from branch_and_bound import reduction
+from branch_and_bound import ReducedMatrix, EdgeNode, choosing_edge
+from tsp_instrument import Instruments
+from tsp_stats import add_stats, empty_stats, initial_variables
 
 def random_tour(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+    edges = as_lists(edges)
     stats = []
     n_nodes_expanded = 0
     n_nodes_pruned = 0
@@ -44,6 +49,7 @@ def random_tour(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
             n_leaves_covered=cut_tree.n_leaves_cut(),
             fraction_leaves_covered=cut_tree.fraction_leaves_covered()
         ))
+        timer.record(stats[-1])
 
     if not stats:
         return [SolutionStats(
@@ -57,157 +63,394 @@ def random_tour(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
             cut_tree.fraction_leaves_covered()
         )]
 
-def empty_stats(timer, edges) -> list[SolutionStats]:
-    n_nodes_expanded = 0
-    n_nodes_pruned = 0
-    cut_tree = CutTree(len(edges))
-
-    return [SolutionStats(
-        [],
-        math.inf,
-        timer.time(),
-        1,
-        n_nodes_expanded,
-        n_nodes_pruned,
-        cut_tree.n_leaves_cut(),
-        cut_tree.fraction_leaves_covered()
-    )]
 
+# About how many bytes greedy_tour's per-batch work arrays may take
+_GREEDY_MEMORY = 64 << 20
+
+# How many greedy start cities the B&B solvers try for their first upper bound
+WARM_START_STARTS = 64
+
+# How many nearest neighbours of each city greedy_tour checks before it scans the whole row
+_GREEDY_NEIGHBOURS = 16
+
+
+def nearest_neighbours(graph: np.ndarray, k: int, timer: Timer = None) -> np.ndarray | None:
+    """
+    Each city's k nearest cities, nearest first (ties to the highest-numbered city).
+    Only the k nearest of each row are sorted: a partition finds the k-th smallest distance,
+    and the cities tied with it are taken highest first until there are k.
+    Rows are done in blocks, so the temporaries stay within _GREEDY_MEMORY.
+    Returns None if timer times out (checked between blocks).
+    """
+    n = len(graph)
+    k = min(k, n)
+    neighbours = np.empty((n, k), dtype=int)
+    if k == 0:
+        return neighbours
+    block = max(1, _GREEDY_MEMORY // (24 * max(n, 1)))
+    for first in range(0, n, block):
+        if timer is not None and timer.time_out():
+            return None
+        # Reversed rows, so that a lower position is a higher city
+        rows = graph[first:first + block, ::-1]
+        kth = np.partition(rows, k - 1, axis=1)[:, k - 1:k]
+        closer = rows < kth
+        tied = rows == kth
+        needed = k - closer.sum(axis=1, keepdims=True)
+        take = closer | (tied & (tied.cumsum(axis=1) <= needed))
+        # Exactly k per row, in position order, then stably by distance
+        nearest = np.nonzero(take)[1].reshape(-1, k)
+        order = np.argsort(np.take_along_axis(rows, nearest, axis=1), axis=1, kind='stable')
+        neighbours[first:first + block] = n - 1 - np.take_along_axis(nearest, order, axis=1)
+    return neighbours
+
+
+def greedy_tour(edges: list[list[float]], timer: Timer, starts: int = None) -> list[SolutionStats]:
+    """
+    Nearest-neighbour tours from every start city (or from `starts` of them, spread evenly),
+    reported in start order whenever one beats the best so far.
+    Ties go to the highest-numbered city.
+
+    A batch of starts is advanced together. Each step first looks through the current
+    cities' _GREEDY_NEIGHBOURS nearest neighbours for the first unvisited one, which settles
+    most steps in O(batch * k); only the tours whose neighbours are all taken get a masked
+    argmin over their full row. After the first start, which runs alone so a tour comes early,
+    batches are as large as _GREEDY_MEMORY allows.
+    All n starts are still up to O(n^3) when many steps need the full scan,
+    so callers that only want a quick tour (e.g. B&B warm starts) should cap starts.
+    """
+    stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges)
+    n = len(edges)
+    if n == 0:
+        return empty_stats(timer, edges)
 
-def initial_variables(edges, stats=[]):
-    if not stats:
-        stats = []
+    graph = np.asarray(edges, dtype=float)
+    if starts is None or starts >= n:
+        start_cities = np.arange(n)
     else:
-        stats = copy.deepcopy(stats)
-    n_nodes_expanded = 0
-    n_nodes_pruned = 0
-    cut_tree = CutTree(len(edges))
-    return stats, n_nodes_expanded, n_nodes_pruned, cut_tree
-
+        start_cities = np.linspace(0, n, max(starts, 1), endpoint=False).astype(int)
+    neighbours = nearest_neighbours(graph, _GREEDY_NEIGHBOURS, timer)
+    if neighbours is None:
+        return empty_stats(timer, edges)
+    # Two batch x n arrays (the visited mask and the tours) plus the full-row scans
+    batch_size = max(1, min(len(start_cities), _GREEDY_MEMORY // (24 * n)))
+
+    # The first start runs on its own, so there is a tour early even when the budget is tight
+    bounds = [0, *range(1, len(start_cities), batch_size), len(start_cities)]
+    for first, last in zip(bounds, bounds[1:]):
+        batch_starts = start_cities[first:last]
+        batch = np.arange(batch_starts.size)
+
+        tours = np.empty((batch_starts.size, n), dtype=int)
+        tours[:, 0] = batch_starts
+        # inf where the city has already been visited
+        visited = np.zeros((batch_starts.size, n))
+        visited[batch, batch_starts] = inf
+        current = batch_starts
+
+        for step in range(1, n):
+            if timer.time_out():
+                return stats or empty_stats(timer, edges)
+
+            candidates = neighbours[current]
+            free = visited[batch[:, None], candidates] == 0
+            nxt = candidates[batch, free.argmax(axis=1)]
+            # An inf candidate is left to the full scan, so all-inf rows are handled as before
+            scan = np.flatnonzero(~free.any(axis=1) | (graph[current, nxt] == inf))
+            if scan.size:
+                keys = graph[current[scan]]
+                keys += visited[scan]
+                # Columns are reversed so argmin's first-index tie-break picks the highest city
+                found = n - 1 - keys[:, ::-1].argmin(axis=1)
+                # If every unvisited edge is inf, argmin may land on a visited city;
+                # such a tour scores inf anyway, so just take any unvisited city
+                stuck = visited[scan, found] == inf
+                if stuck.any():
+                    found[stuck] = (visited[scan[stuck]] == 0).argmax(axis=1)
+                nxt[scan] = found
+
+            current = nxt
+            visited[batch, current] = inf
+            tours[:, step] = current
+            n_nodes_expanded += batch_starts.size
+
+        # cumsum adds left to right, so the scores match score_tour exactly
+        scores = graph[tours, np.roll(tours, -1, axis=1)].cumsum(axis=1)[:, -1]
+        for tour, score in zip(tours.tolist(), scores.tolist()):
+            if math.isinf(score) or (stats and score >= stats[-1].score):
+                continue
+            stats = add_stats(stats, timer, n_nodes_expanded,
+                              n_nodes_pruned, cut_tree, "greedy", tour, edges)
 
-def add_stats(stats,timer, n_nodes_expanded,
-              n_nodes_pruned, cut_tree, string, tour,edges, bssf_cost=0):
+    if not stats:
+        result = empty_stats(timer, edges)
+        return result
 
 
-    cost = score_tour(tour, edges)
-    solution_stats = SolutionStats(
-        tour=tour,
-        score=cost,
-        time=timer.time(),
-        max_queue_size=1,
-        n_nodes_expanded=n_nodes_expanded,
-        n_nodes_pruned=n_nodes_pruned,
-        n_leaves_covered=cut_tree.n_leaves_cut(),
-        fraction_leaves_covered=cut_tree.fraction_leaves_covered()
-    )
+    return stats
 
 
-    if string == "greedy":
-        cost = score_tour(tour, edges)
-        print(f"Score: {cost}, Tour: {tour}")
-        if not math.isinf(cost):
-            if not stats:
-                stats.append(solution_stats)
-            elif stats[-1].score > cost:
-                stats.append(solution_stats)
-        return stats
-    elif string == "branch and bound" or string == "dfs":
-        if cost < bssf_cost:
-            bssf_cost = cost
-            stats.append(solution_stats)
-        return stats, bssf_cost
+def dfs(edges: list[list[float]], timer: Timer, nearest_first: bool = False,
+        instruments: Instruments = None) -> list[SolutionStats]:
+    """
+    Depth-first search over paths starting at city 0, kept as one path edited in place.
+    A branch is pruned as soon as its edge is inf, or (when no edge weight is negative)
+    as soon as the cost of the partial path reaches the best tour so far.
+    With nearest_first=True the children of each city are tried nearest first,
+    so good tours are found early.
+    """
+    edges = as_lists(edges)
+    stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges)
+    bssf_cost = inf
+    n = len(edges)
+    if n == 0:
+        return empty_stats(timer, edges)
+
+    # Partial costs can only grow if there are no negative edges
+    prune_by_cost = all(edge >= 0 for row in edges for edge in row)
+
+    def children(city, visited):
+        cities = [c for c in range(n) if not (visited >> c) & 1]
+        if nearest_first:
+            # Candidates are popped from the end, so the nearest goes last
+            row = edges[city]
+            cities.sort(key=lambda c: row[c], reverse=True)
+        return cities
+
+    path = [0]
+    costs = [0]
+    visited = 1
+    frames = [children(0, visited)]
+    lap = None
+    # Counted here and handed to instruments at the end: a call per prune would cost more than dfs's nodes
+    n_infeasible = 0
+
+    while frames and not timer.time_out():
+        candidates = frames[-1]
+        if not candidates:
+            frames.pop()
+            if len(path) > 1:
+                visited ^= 1 << path.pop()
+                costs.pop()
+            if lap:
+                lap('queue')
+            continue
 
+        city = candidates.pop()
+        cost = costs[-1] + edges[path[-1]][city]
+        if math.isinf(cost) or (prune_by_cost and cost >= bssf_cost):
+            n_nodes_pruned += 1
+            if lap:
+                lap('queue')
+            cut_tree.cut(path + [city])
+            if lap:
+                lap('cut_tree')
+            if instruments and cost == inf:
+                n_infeasible += 1
+            continue
 
+        n_nodes_expanded += 1
+        if instruments:
+            lap = instruments.node(timer, n_nodes_expanded)
+        if len(path) == n - 1:
+            stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded,
+                              n_nodes_pruned, cut_tree, "dfs", path + [city], edges, bssf_cost)
+            continue
 
+        path.append(city)
+        costs.append(cost)
+        visited |= 1 << city
+        frames.append(children(city, visited))
+        if lap:
+            lap('expansion')
 
-def greedy_tour(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
-    stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges)
+    if instruments:
+        instruments.prune_children(n_nodes_pruned, n_infeasible, 'bound')
 
-    cities = deque(range(len(edges)))
+    if not stats:
+        result = empty_stats(timer, edges)
+        return result
+    return stats
 
-    def set_next(current_city, edges, tour, initial_city):
-        outgoing_edges = edges[current_city]
 
-        smallest = float('inf')
-        smallest_index = 0
-        finished = False
-        index = -1
-        if len(tour) != len(edges)-1:
-            for edge in outgoing_edges:
-                index += 1
-                if  index not in tour and edge != 0 and index != initial_city:
-                    stop = False
-                    if edge <= smallest:
-                        smallest = edge
-                        smallest_index = index
-        else:
-            finished = True
-            first = outgoing_edges[initial_city]
-            smallest_index = initial_city
+def branch_and_bound(edges: list[list[float]], timer: Timer,
+                     bound: BoundProvider = None, instruments: Instruments = None) -> list[SolutionStats]:
+    stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges)
+    max_queue_size = 1
 
+    new_timer = timer.child(20)
+    stat = greedy_tour(edges, new_timer, starts=WARM_START_STARTS)
+    if not stat:
+        bssf_cost = inf
+    else:
+        bssf_cost = stat[-1].score
+        stats.append(stat[-1])
 
+    bound = bound or ReductionBound()
+    initial_graph, initial_lb = bound.root(edges)
 
+    n = len(edges)
+    stack = [SearchNode.root(0, initial_lb, initial_graph)]
+    lap = None
 
-        next_city = smallest_index
-        tour.add(smallest_index)
-        return next_city, tour, finished
 
+    while stack and not timer.time_out():
 
-    while cities:
+        node = stack.pop()
+        n_nodes_expanded += 1
+        bssf_cost = min(bssf_cost, timer.upper_bound())
+        if instruments:
+            lap = instruments.node(timer, n_nodes_expanded)
 
-        initial_city = cities.popleft()  # Efficiently removes the first element
+        if node.bound >= bssf_cost:
+            n_nodes_pruned += 1
+            cut_tree.cut(node.path())
+            if lap:
+                lap('cut_tree')
+            if instruments:
+                instruments.prune('bound', node.bound)
+            continue
 
-        set_tour = set()
-        tour = [initial_city]
-        current_city = initial_city
-        while True:
 
-            if timer.time_out():
-                return stats
+        if node.is_complete(n):
+            stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded,
+                n_nodes_pruned, cut_tree, "branch and bound", node.path(), edges, bssf_cost, max_queue_size)
+            continue
 
-            next_city, set_tour, finished  = set_next(current_city, edges, set_tour, initial_city)
 
+        last = node.city
+        remaining = node.unvisited(n)
+        states, new_lbs = bound.children(node, remaining, bssf_cost, lap)
+        if lap:
+            lap('bound')
+        children = []
+        pruned = []
+        for nxt, new_graph, new_lb in zip(remaining, states, new_lbs):
+            if new_lb < bssf_cost:
+                children.append(node.child(nxt, edges[last][nxt], new_lb, new_graph))
+            else:
+                pruned.append(nxt)
+        if lap:
+            lap('expansion')
 
-            if finished:
-                stats = add_stats(stats, timer, n_nodes_expanded,
-                                  n_nodes_pruned, cut_tree, "greedy", tour, edges)
-                break
+        stack.extend(children)
+        max_queue_size = max(max_queue_size, len(stack))
+        if lap:
+            lap('queue')
+        if pruned:
+            n_nodes_pruned += len(pruned)
+            cut_tree.cut_children(node.path(), pruned)
+            if lap:
+                lap('cut_tree')
+            if instruments:
+                instruments.prune_children(len(pruned), new_lbs.count(inf))
 
-            tour.append(next_city)
-            current_city = next_city
-            n_nodes_expanded += 1
 
-        stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges, stats)
-        continue
 
     if not stats:
         result = empty_stats(timer, edges)
         return result
-
-
     return stats
 
 
 
 
-def dfs(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+def branch_and_bound_inplace(edges: list[list[float]], timer: Timer,
+                             instruments: Instruments = None) -> list[SolutionStats]:
+    """
+    Depth-first B&B that branches on one ReducedMatrix in place
+    and backs out of each child through the matrix's undo log,
+    so memory stays O(n^2 + depth * n) instead of one matrix per frontier node.
+    """
     stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges)
-    bssf_cost = inf
-    stack = [[0]]
-    while stack and not timer.time_out():
-        path = stack.pop()
-        outgoing_edges = [i for i in range(len(edges)) if i not in path]
-        for city in outgoing_edges:
-            new_path = path + [city]
-
-            if len(new_path) == len(edges):
-                stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded,
-                                  n_nodes_pruned, cut_tree, "dfs", new_path, edges, bssf_cost)
-                continue
+    max_queue_size = 1
+    n = len(edges)
+
+    new_timer = timer.child(20)
+    stat = greedy_tour(edges, new_timer, starts=WARM_START_STARTS)
+    if not stat:
+        bssf_cost = inf
+    else:
+        bssf_cost = stat[-1].score
+        stats.append(stat[-1])
+
+    matrix = ReducedMatrix(edges)
+    path = [0]
+    in_path = [False] * n
+    in_path[0] = True
+
+    # One frame per city on the path: (lower bound, cities still to try from it)
+    # and one undo mark per step taken below the root
+    frames = [(matrix.lower_bound, list(range(n - 1, 0, -1)))]
+    marks = []
+    lap = None
+    # Children are pruned far more often than nodes are expanded, so their prunes are counted here
+    # and handed to instruments at the end, as in dfs
+    n_children_pruned = n_infeasible = 0
+
+    while frames and not timer.time_out():
+        lb, candidates = frames[-1]
+
+        if lb >= bssf_cost or not candidates:
+            if lb >= bssf_cost:
+                n_nodes_pruned += 1
+                if lap:
+                    lap('queue')
+                cut_tree.cut(path)
+                if lap:
+                    lap('cut_tree')
+                if instruments:
+                    instruments.prune('bound', lb)
+            frames.pop()
+            if marks:
+                matrix.undo(marks.pop())
+                in_path[path.pop()] = False
+            if lap:
+                lap('expansion')
+            continue
+
+        nxt = candidates.pop()
+        mark = matrix.mark()
+        if lap:
+            lap('queue')
+        new_lb = lb + matrix.branch(path[-1], nxt)
+        if lap:
+            lap('bound')
+
+        if new_lb >= bssf_cost:
+            n_nodes_pruned += 1
+            cut_tree.cut(path + [nxt])
+            if lap:
+                lap('cut_tree')
+            matrix.undo(mark)
+            if lap:
+                lap('expansion')
+            if instruments:
+                n_children_pruned += 1
+                n_infeasible += new_lb == inf
+            continue
+
+        path.append(nxt)
+        in_path[nxt] = True
+        n_nodes_expanded += 1
+        if instruments:
+            lap = instruments.node(timer, n_nodes_expanded)
+
+        if len(path) == n:
+            stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded,
+                n_nodes_pruned, cut_tree, "branch and bound", list(path), edges, bssf_cost, max_queue_size)
+            matrix.undo(mark)
+            in_path[path.pop()] = False
+            continue
 
-            stack.append(new_path)
-            n_nodes_expanded += 1
+        marks.append(mark)
+        frames.append((new_lb, [c for c in range(n - 1, -1, -1) if not in_path[c]]))
+        max_queue_size = max(max_queue_size, len(frames))
+        if lap:
+            lap('expansion')
 
+    if instruments:
+        instruments.prune_children(n_children_pruned, n_infeasible)
 
     if not stats:
         result = empty_stats(timer, edges)
@@ -215,66 +458,72 @@ def dfs(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
     return stats
 
 
-def branch_and_bound(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+def branch_and_bound_edges(edges: list[list[float]], timer: Timer,
+                           instruments: Instruments = None) -> list[SolutionStats]:
+    """
+    Little's algorithm: depth-first B&B that branches on single edges
+    (include (i, j) / exclude (i, j)) instead of on the next city in the path.
+    The CutTree is indexed by city paths, so coverage is not tracked here.
+    """
     stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges)
     max_queue_size = 1
 
-    new_timer = Timer(20)
-    stat = greedy_tour(edges, new_timer)
+    new_timer = timer.child(20)
+    stat = greedy_tour(edges, new_timer, starts=WARM_START_STARTS)
     if not stat:
         bssf_cost = inf
     else:
         bssf_cost = stat[-1].score
         stats.append(stat[-1])
 
-    for i in range(len(edges)): edges[i][i] = inf
-    initial_graph, initial_lb = reduction(edges)
-
-    stack = [([0], initial_graph, initial_lb)]
+    if len(edges) < 2:
+        return stats or empty_stats(timer, edges)
 
+    stack = [EdgeNode.root(edges)]
+    lap = None
 
     while stack and not timer.time_out():
 
-        path, reduced_graph, lb = stack.pop()
+        node = stack.pop()
         n_nodes_expanded += 1
+        if instruments:
+            lap = instruments.node(timer, n_nodes_expanded)
 
-
-        if lb >= bssf_cost:
+        if node.bound >= bssf_cost:
             n_nodes_pruned += 1
-            cut_tree.cut(path)
+            if instruments:
+                instruments.prune('bound', node.bound)
             continue
 
-
-        if len(path) == len(edges):
+        if node.is_complete():
             stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded,
-                n_nodes_pruned, cut_tree, "branch and bound", path, edges, bssf_cost)
+                n_nodes_pruned, cut_tree, "branch and bound", node.tour(), edges, bssf_cost, max_queue_size)
             continue
 
-
-        last = path[-1]
-        remaining = [i for i in range(len(edges)) if i not in path]
-        for nxt in remaining:
-
-
-            new_graph = copy.deepcopy(reduced_graph)
-
-            move_cost = new_graph[last][nxt]
-            for j in range(len(edges)):      new_graph[last][j] = inf
-            for i in range(len(edges)):      new_graph[i][nxt] = inf
-            new_graph[nxt][last] = inf
-
-            new_graph, extra_lb = reduction(new_graph)
-            new_lb = lb + extra_lb + move_cost
-
-
-            if new_lb < bssf_cost:
-                stack.append((path + [nxt], new_graph, new_lb))
+        choice = choosing_edge(node.graph)
+        if lap:
+            lap('bound')
+        if choice is None:
+            n_nodes_pruned += 1
+            if instruments:
+                instruments.prune('infeasible', inf)
+            continue
+        i, j, _ = choice
+
+        # The include child is pushed last so it is explored first
+        children = node.exclude(i, j), node.include(i, j)
+        if lap:
+            lap('expansion')
+        for child in children:
+            if child.bound < bssf_cost:
+                stack.append(child)
                 max_queue_size = max(max_queue_size, len(stack))
             else:
                 n_nodes_pruned += 1
-                cut_tree.cut(path + [nxt])
-
-
+                if instruments:
+                    instruments.prune('child_bound', child.bound)
+        if lap:
+            lap('queue')
 
     if not stats:
         result = empty_stats(timer, edges)
@@ -282,65 +531,78 @@ def branch_and_bound(edges: list[list[float]], timer: Timer) -> list[SolutionSta
     return stats
 
 
-
-
-def branch_and_bound_smart(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+def branch_and_bound_smart(edges: list[list[float]], timer: Timer,
+                           priority: Priority = depth_weighted,
+                           bound: BoundProvider = None, instruments: Instruments = None) -> list[SolutionStats]:
     stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(edges)
-    max_queue_size = 1
 
-    new_timer = Timer(3)
-    stat = greedy_tour(edges, new_timer)
+    new_timer = timer.child(3)
+    stat = greedy_tour(edges, new_timer, starts=WARM_START_STARTS)
     if not stat:
         bssf_cost = inf
     else:
         bssf_cost = stat[-1].score
         stats.append(stat[-1])
 
-    for i in range(len(edges)): edges[i][i] = inf
-    initial_graph, initial_lb = reduction(edges)
+    bound = bound or ReductionBound()
+    initial_graph, initial_lb = bound.root(edges)
 
-    iteration = ([0], initial_graph, initial_lb)
+    n = len(edges)
+    iteration = SearchNode.root(0, initial_lb, initial_graph)
 
-    priority_queue = queue.PriorityQueue()
-    priority_queue.put((1,iteration))
+    frontier = Frontier(priority)
+    frontier.push(iteration)
+    lap = None
 
-    while not priority_queue.empty() and not timer.time_out():
+    while frontier and not timer.time_out():
 
 
-        score, (path, reduced_graph, lb) = priority_queue.get()
+        node = frontier.pop()
         n_nodes_expanded += 1
+        bssf_cost = min(bssf_cost, timer.upper_bound())
+        if instruments:
+            lap = instruments.node(timer, n_nodes_expanded)
 
-        if lb >= bssf_cost:
+        if node.bound >= bssf_cost:
             n_nodes_pruned += 1
-            cut_tree.cut(path)
+            cut_tree.cut(node.path())
+            if lap:
+                lap('cut_tree')
+            if instruments:
+                instruments.prune('bound', node.bound)
             continue
 
-        if len(path) == len(edges):
+        if node.is_complete(n):
             stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded,
-                                         n_nodes_pruned, cut_tree, "branch and bound", path, edges, bssf_cost)
+                                         n_nodes_pruned, cut_tree, "branch and bound", node.path(), edges, bssf_cost,
+                                         frontier.max_size)
             continue
 
-        last = path[-1]
-        remaining = [i for i in range(len(edges)) if i not in path]
-        for city in remaining:
-
-            new_graph = copy.deepcopy(reduced_graph)
-
-            move_cost = new_graph[last][city]
-            for j in range(len(edges)):      new_graph[last][j] = inf
-            for i in range(len(edges)):      new_graph[i][city] = inf
-            new_graph[city][last] = inf
-
-            new_graph, extra_lb = reduction(new_graph)
-            new_lb = lb + extra_lb + move_cost
-
+        last = node.city
+        remaining = node.unvisited(n)
+        states, new_lbs = bound.children(node, remaining, bssf_cost, lap)
+        if lap:
+            lap('bound')
+        children = []
+        pruned = []
+        for city, new_graph, new_lb in zip(remaining, states, new_lbs):
             if new_lb < bssf_cost:
-                score = new_lb - 2 * (len(path)+1)
-                priority_queue.put((score,(path + [city], new_graph, new_lb)))
-                max_queue_size = max(max_queue_size, priority_queue.qsize())
+                children.append(node.child(city, edges[last][city], new_lb, new_graph))
             else:
-                n_nodes_pruned += 1
-                cut_tree.cut(path + [city])
+                pruned.append(city)
+        if lap:
+            lap('expansion')
+
+        frontier.extend(children)
+        if lap:
+            lap('queue')
+        if pruned:
+            n_nodes_pruned += len(pruned)
+            cut_tree.cut_children(node.path(), pruned)
+            if lap:
+                lap('cut_tree')
+            if instruments:
+                instruments.prune_children(len(pruned), new_lbs.count(inf))
     print(f"Score is {bssf_cost}")
 
     if not stats:
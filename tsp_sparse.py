@@ -0,0 +1,317 @@
+import numpy as np
+from math import inf
+
+from tsp_core import SolutionStats, Timer
+from tsp_search import SearchNode
+from tsp_stats import add_stats, empty_stats, initial_variables
+
+
+class _Row(dict):
+    """One city's out-edges by destination; a missing edge weighs inf"""
+
+    def __missing__(self, city):
+        return inf
+
+
+class SparseGraph:
+    """
+    The finite edges of a network in CSR form, for heavily reduced networks.
+    Self-loops are left out.
+
+    The out-edges of city i are src/dst/cost[out_ptr[i]:out_ptr[i + 1]], cheapest first.
+    in_order lists the same edges by destination:
+    the in-edges of city j are in_order[in_ptr[j]:in_ptr[j + 1]].
+
+    graph[i][j] is the weight of i -> j (inf if there is no such edge) and len(graph) is n,
+    so a SparseGraph can be scored and reported on (score_tour, add_stats) like the list of lists.
+    """
+
+    def __init__(self, n: int, src: np.ndarray, dst: np.ndarray, cost: np.ndarray):
+        finite = np.isfinite(cost)
+        loops = finite & (src == dst)
+        keep = finite & ~loops
+        self_loops = dict(zip(src[loops].tolist(), cost[loops].tolist()))
+        src, dst, cost = src[keep], dst[keep], cost[keep]
+
+        # By source, then cheapest first (ties to the highest city, as greedy_tour breaks them)
+        order = np.lexsort((-dst, cost, src))
+        self.n = n
+        self.src, self.dst, self.cost = src[order], dst[order], cost[order].astype(float)
+        self.out_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.src, minlength=n))))
+        self.in_order = np.argsort(self.dst, kind='stable')
+        self.in_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.dst, minlength=n))))
+
+        # The same out-edges as Python lists, for the solvers that walk them one at a time
+        dst_list, cost_list, ptr = self.dst.tolist(), self.cost.tolist(), self.out_ptr.tolist()
+        self.out = [list(zip(dst_list[ptr[i]:ptr[i + 1]], cost_list[ptr[i]:ptr[i + 1]])) for i in range(n)]
+        # Self-loops are left out of the search, but still weighed (as the 1-city tour does)
+        self.rows = [_Row(out) for out in self.out]
+        for city, cost in self_loops.items():
+            self.rows[city][city] = cost
+
+    @staticmethod
+    def from_edges(edges) -> 'SparseGraph':
+        """The finite edges of an n x n matrix of edge weights (lists, an array or a DistanceMatrix)"""
+        weights = np.asarray(edges, dtype=float)
+        n = len(weights)
+        src, dst = np.nonzero(np.isfinite(weights.reshape(n, n)))
+        return SparseGraph(n, src, dst, weights.reshape(n, n)[src, dst])
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.cost)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, city: int) -> _Row:
+        return self.rows[city]
+
+
+def as_sparse(edges) -> SparseGraph:
+    """edges as a SparseGraph (which is returned as it is)"""
+    return edges if isinstance(edges, SparseGraph) else SparseGraph.from_edges(edges)
+
+
+def _segment_min(values: np.ndarray, ptr: np.ndarray) -> np.ndarray:
+    """The minimum of each row of values over each segment ptr[i]:ptr[i + 1] (inf for empty segments)"""
+    padded = np.concatenate((values, np.full((len(values), 1), inf)), axis=1)
+    mins = np.minimum.reduceat(padded, ptr[:-1], axis=1)
+    mins[:, ptr[:-1] == ptr[1:]] = inf
+    return mins
+
+
+class SparseReductionBound:
+    """
+    The row/column reduction bound, computed over a SparseGraph's finite edges,
+    so bounding a child costs O(edges) instead of O(n^2).
+
+    The state is the node's free mask: the cities that are not on the path.
+    A child's bound is the path cost plus the row then column reduction of the edges still usable:
+    every free city and the child need an out-edge (to a free city, or back to 0 once none are left),
+    and every free city and city 0 need an in-edge.
+    Unlike ReductionBound, the reduced costs are not carried down the tree;
+    each child is reduced from the original weights.
+    """
+
+    def root(self, edges):
+        self.graph = as_sparse(edges)
+        n = len(self.graph)
+        free = np.ones(n, dtype=bool)
+        free[0] = False
+        if n < 2:
+            return free, 0
+        return free, float(self._reduction(np.ones((1, self.graph.n_edges), dtype=bool),
+                                           np.ones(n, dtype=bool), np.ones((1, n), dtype=bool))[0])
+
+    def children(self, node: SearchNode, cities: list[int], upper_bound: float):
+        graph = self.graph
+        cities = np.asarray(cities, dtype=int)
+        row = graph.rows[node.city]
+        costs = np.array([row[city] for city in cities.tolist()], dtype=float)
+        free = node.graph
+
+        # Rows: the child and the free cities, i.e. everything free now. Columns: free minus the child, and 0
+        columns = free.copy()
+        columns[0] = True
+        columns = np.repeat(columns[None, :], len(cities), axis=0)
+        columns[np.arange(len(cities)), cities] = False
+
+        allowed = free[graph.src][None, :] & columns[:, graph.dst]
+        if free.sum() > 1:
+            # The child can't go straight back to 0 while there are free cities left
+            allowed &= ~((graph.src[None, :] == cities[:, None]) & (graph.dst == 0)[None, :])
+
+        bounds = node.cost + costs + self._reduction(allowed, free, columns)
+        states = []
+        for city, child_bound in zip(cities.tolist(), bounds.tolist()):
+            if child_bound < upper_bound:
+                child_free = free.copy()
+                child_free[city] = False
+                states.append(child_free)
+            else:
+                states.append(None)
+        return states, bounds.tolist()
+
+    def _reduction(self, allowed: np.ndarray, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """
+        One bound per row of allowed (a mask over the edges): the row minima over rows
+        plus the column minima of what is left over columns (inf if one of them has no edge)
+        """
+        graph = self.graph
+        costs = np.where(allowed, graph.cost[None, :], inf)
+        row_min = _segment_min(costs, graph.out_ptr)
+        row_total = np.where(rows[None, :], row_min, 0).sum(axis=1)
+
+        # Rows with no allowed edge leave their costs at inf, and inf - inf would be nan
+        row_min = np.where(np.isfinite(row_min), row_min, 0)
+        reduced = costs - row_min[:, graph.src]
+        col_min = _segment_min(reduced[:, graph.in_order], graph.in_ptr)
+        return row_total + np.where(columns, col_min, 0).sum(axis=1)
+
+
+def _bits(mask: int):
+    """The indices of the set bits of mask"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def sparse_greedy(edges, timer: Timer) -> list[SolutionStats]:
+    """
+    greedy_tour on a SparseGraph: nearest-neighbour tours from every start city,
+    each step scanning only the current city's out-edges (cheapest first) for an unvisited city.
+    A start that reaches a city with no way on is given up.
+    """
+    graph = as_sparse(edges)
+    stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(graph)
+    n = len(graph)
+
+    for start in range(n):
+        tour = [start]
+        visited = 1 << start
+        for _ in range(n - 1):
+            if timer.time_out():
+                return stats or empty_stats(timer, graph)
+            n_nodes_expanded += 1
+            city = next((city for city, _ in graph.out[tour[-1]] if not (visited >> city) & 1), None)
+            if city is None:
+                n_nodes_pruned += 1
+                break
+            tour.append(city)
+            visited |= 1 << city
+        else:
+            stats = add_stats(stats, timer, n_nodes_expanded,
+                              n_nodes_pruned, cut_tree, "greedy", tour, graph)
+
+    return stats or empty_stats(timer, graph)
+
+
+def sparse_dfs(edges, timer: Timer, nearest_first: bool = False) -> list[SolutionStats]:
+    """
+    dfs on a SparseGraph: only the out-edges of each city are tried.
+    The branches along missing edges are counted as pruned and cut in one go,
+    without being visited.
+    """
+    graph = as_sparse(edges)
+    stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(graph)
+    bssf_cost = inf
+    n = len(graph)
+    if n == 0:
+        return empty_stats(timer, graph)
+    everyone = (1 << n) - 1
+
+    # Partial costs can only grow if there are no negative edges
+    prune_by_cost = bool((graph.cost >= 0).all())
+    out_masks = [sum(1 << city for city, _ in out) for out in graph.out]
+
+    def children(path, visited):
+        nonlocal n_nodes_pruned
+        city = path[-1]
+        missing = list(_bits(everyone & ~visited & ~out_masks[city]))
+        if missing and len(path) < n:
+            n_nodes_pruned += len(missing)
+            cut_tree.cut_children(path, missing)
+
+        if nearest_first:
+            # Candidates are popped from the end, so the nearest goes last
+            return [(c, cost) for c, cost in reversed(graph.out[city]) if not (visited >> c) & 1]
+        return sorted((c, cost) for c, cost in graph.out[city] if not (visited >> c) & 1)
+
+    path = [0]
+    costs = [0]
+    visited = 1
+    frames = [children(path, visited)]
+
+    while frames and not timer.time_out():
+        candidates = frames[-1]
+        if not candidates:
+            frames.pop()
+            if len(path) > 1:
+                visited ^= 1 << path.pop()
+                costs.pop()
+            continue
+
+        city, edge = candidates.pop()
+        cost = costs[-1] + edge
+        if prune_by_cost and cost >= bssf_cost:
+            n_nodes_pruned += 1
+            cut_tree.cut(path + [city])
+            continue
+
+        n_nodes_expanded += 1
+        if len(path) == n - 1:
+            stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded,
+                                         n_nodes_pruned, cut_tree, "dfs", path + [city], graph, bssf_cost)
+            continue
+
+        path.append(city)
+        costs.append(cost)
+        visited |= 1 << city
+        frames.append(children(path, visited))
+
+    return stats or empty_stats(timer, graph)
+
+
+def sparse_branch_and_bound(edges, timer: Timer) -> list[SolutionStats]:
+    """
+    branch_and_bound on a SparseGraph with the SparseReductionBound.
+    Each node only branches along its city's out-edges, and bounding its children
+    costs O(children * edges), so the time per node follows the number of edges, not n^2.
+    """
+    graph = as_sparse(edges)
+    n = len(graph)
+    if n < 3:
+        return sparse_dfs(graph, timer)
+
+    stats, n_nodes_expanded, n_nodes_pruned, cut_tree = initial_variables(graph)
+    max_queue_size = 1
+
+    greedy = [st for st in sparse_greedy(graph, timer.child(3)) if st.tour]
+    bssf_cost = greedy[-1].score if greedy else inf
+    stats.extend(greedy[-1:])
+
+    bound = SparseReductionBound()
+    free, root_bound = bound.root(graph)
+    stack = [SearchNode.root(0, root_bound, free)]
+
+    while stack and not timer.time_out():
+        node = stack.pop()
+        n_nodes_expanded += 1
+        bssf_cost = min(bssf_cost, timer.upper_bound())
+
+        if node.bound >= bssf_cost:
+            n_nodes_pruned += 1
+            cut_tree.cut(node.path())
+            continue
+
+        if node.is_complete(n):
+            stats, bssf_cost = add_stats(stats, timer, n_nodes_expanded, n_nodes_pruned, cut_tree,
+                                         "branch and bound", node.path(), graph, bssf_cost, max_queue_size)
+            continue
+
+        free = node.graph
+        cities = [city for city, _ in graph.out[node.city] if free[city]]
+        # Free cities with no edge from here are cut without being bounded
+        missing = free.copy()
+        missing[cities] = False
+        pruned = np.flatnonzero(missing).tolist()
+        children = []
+        if cities:
+            states, bounds = bound.children(node, cities, bssf_cost)
+            for city, state, child_bound in zip(cities, states, bounds):
+                if child_bound < bssf_cost:
+                    children.append(node.child(city, graph[node.city][city], child_bound, state))
+                else:
+                    pruned.append(city)
+
+        # Push the best child last, so it is searched first
+        children.sort(key=lambda child: child.bound, reverse=True)
+        stack.extend(children)
+        max_queue_size = max(max_queue_size, len(stack))
+        if pruned:
+            n_nodes_pruned += len(pruned)
+            cut_tree.cut_children(node.path(), pruned)
+
+    return stats or empty_stats(timer, graph)
@@ -0,0 +1,64 @@
+import copy
+import math
+
+from tsp_core import SolutionStats, score_tour
+from tsp_cuttree import CutTree
+
+
+def empty_stats(timer, edges) -> list[SolutionStats]:
+    n_nodes_expanded = 0
+    n_nodes_pruned = 0
+    cut_tree = CutTree(len(edges))
+
+    return [SolutionStats(
+        [],
+        math.inf,
+        timer.time(),
+        1,
+        n_nodes_expanded,
+        n_nodes_pruned,
+        cut_tree.n_leaves_cut(),
+        cut_tree.fraction_leaves_covered()
+    )]
+
+
+def initial_variables(edges, stats=[]):
+    if not stats:
+        stats = []
+    else:
+        stats = copy.deepcopy(stats)
+    n_nodes_expanded = 0
+    n_nodes_pruned = 0
+    cut_tree = CutTree(len(edges))
+    return stats, n_nodes_expanded, n_nodes_pruned, cut_tree
+
+
+def add_stats(stats,timer, n_nodes_expanded,
+              n_nodes_pruned, cut_tree, string, tour,edges, bssf_cost=0, max_queue_size=1):
+
+
+    cost = score_tour(tour, edges)
+    solution_stats = SolutionStats(
+        tour=tour,
+        score=cost,
+        time=timer.time(),
+        max_queue_size=max_queue_size,
+        n_nodes_expanded=n_nodes_expanded,
+        n_nodes_pruned=n_nodes_pruned,
+        n_leaves_covered=cut_tree.n_leaves_cut(),
+        fraction_leaves_covered=cut_tree.fraction_leaves_covered()
+    )
+
+
+    if string == "greedy":
+        if not math.isinf(cost):
+            if not stats or stats[-1].score > cost:
+                stats.append(solution_stats)
+                timer.record(solution_stats)
+        return stats
+    elif string == "branch and bound" or string == "dfs" or string == "local search":
+        if cost < bssf_cost:
+            bssf_cost = cost
+            stats.append(solution_stats)
+            timer.record(solution_stats)
+        return stats, bssf_cost
@@ -0,0 +1,108 @@
+import queue
+import threading
+from math import inf
+from typing import Callable, Iterator, Optional
+
+from tsp_core import SolutionStats, Solver, StreamingSolver, Timer
+from tsp_stats import empty_stats
+
+# Put on the queue when the solver returns
+_DONE = object()
+
+
+class StreamTimer(Timer):
+    """
+    Wraps the caller's timer for a solver running in a background thread:
+    recorded solutions go onto a queue (and to the wrapped timer),
+    and stop() makes the solver time out at its next check.
+    """
+
+    def __init__(self, timer: Timer, found: queue.Queue):
+        super().__init__(timer.time_limit)
+        self.start = timer.start
+        self.timer = timer
+        self.found = found
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def time_out(self) -> bool:
+        return self.stopped.is_set() or super().time_out()
+
+    def record(self, stats: SolutionStats):
+        self.timer.record(stats)
+        self.found.put(stats)
+
+    def upper_bound(self) -> float:
+        return self.timer.upper_bound()
+
+
+def streaming(solver: Solver) -> StreamingSolver:
+    """
+    A StreamingSolver that runs a list-returning solver in a background thread and yields
+    each solution it records (through add_stats) as it comes. Once the solver returns,
+    the improvements from its list that were never recorded are yielded too.
+    Closing the generator stops the solver at its next time check and waits for it.
+    """
+
+    def stream(edges: list[list[float]], timer: Timer) -> Iterator[SolutionStats]:
+        found = queue.Queue()
+        stream_timer = StreamTimer(timer, found)
+        returned = []
+        errors = []
+
+        def run():
+            try:
+                returned.extend(solver(edges, stream_timer))
+            except BaseException as error:
+                errors.append(error)
+            finally:
+                found.put(_DONE)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        best = inf
+        yielded = set()
+        try:
+            while (stats := found.get()) is not _DONE:
+                if stats.score < best:
+                    best = stats.score
+                    yielded.add(id(stats))
+                    yield stats
+            if errors:
+                raise errors[0]
+
+            for stats in returned:
+                if stats.tour and id(stats) not in yielded and stats.score < best:
+                    best = stats.score
+                    yield stats
+        finally:
+            stream_timer.stop()
+            thread.join()
+
+    stream.__name__ = solver.__name__
+    return stream
+
+
+def collect(stream: StreamingSolver) -> Solver:
+    """A list-returning Solver from a StreamingSolver"""
+
+    def solve(edges: list[list[float]], timer: Timer) -> list[SolutionStats]:
+        return list(stream(edges, timer)) or empty_stats(timer, edges)
+
+    solve.__name__ = stream.__name__
+    return solve
+
+
+def first_solution(stream: StreamingSolver, edges: list[list[float]], timer: Timer,
+                   accept: Callable[[SolutionStats], bool] = lambda stats: True) -> Optional[SolutionStats]:
+    """The first solution the stream yields that accept likes (None if there is none in time); stops the solver"""
+    solutions = stream(edges, timer)
+    try:
+        for stats in solutions:
+            if accept(stats):
+                return stats
+        return None
+    finally:
+        solutions.close()